@@ -1,28 +1,112 @@
+import os
+import time
+from dotenv import load_dotenv
+
+_imports_started = time.perf_counter()
+
+# Load .env before importing modules that read their settings at import time
+load_dotenv()
+
+if os.getenv("OFFLINE_MODE", "0") == "1":
+    # Must be set before huggingface_hub and transformers are imported
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
 from fastapi import FastAPI, HTTPException, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from werkzeug.security import check_password_hash
-from util.jwt_auth import create_access_token, get_current_user
+from util.jwt_auth import create_access_token, get_current_user, get_jwt_config, get_token_cache
+from util.passwords import hash_password, verify_password
 from schemas.user import User, RecentSearch, ReviewSummary, ProductDetails, SentimentSummary, Document
-from dotenv import load_dotenv
+from schemas.product import ProductAnalysis
 from util.db import connect_to_mongo
 from contextlib import asynccontextmanager
-from util.search_pipeline import SearchPipeline
-from fastapi.responses import JSONResponse
+from util.search_pipeline import SearchPipeline, StageCallback
+from util.browser_pool import BrowserPool
+from util.product_store import ProductStore
+from util.vector_store import VectorStore
+from util.snapshot_store import SnapshotStore
+from util.user_store import UserStore
+from util.single_flight import FlightProgress, SingleFlight
+from util.jobs import SearchJobManager
+from util.executor import executor_stats, shutdown_executors
+from util.sse import format_sse
+from util.http_client import close_http_client
+from util.scrape import scrape_stats
+from scrapers.registry import product_id_from_url
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.encoders import jsonable_encoder
-from models.query_handler import handle_query
-import re
-import os
+from models.query_handler import handle_query, get_answer_cache, prepare_query, stream_query_answer
+from models.sentiment import sentiment_stats, get_sentiment_cache
+from models.embedding_processor import embedding_stats, EMBEDDING_MODEL_NAME
+from util.warmup import Warmup, check_model_artifacts, offline_mode
+from typing import Any, Dict, Optional, Tuple
+import logging
 
 
-load_dotenv()
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logger.info(f"Imported application modules in {(time.perf_counter() - _imports_started) * 1000:.0f} ms")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    startup_started = time.perf_counter()
+    get_jwt_config()
+    if offline_mode():
+        check_model_artifacts()
+
     users_collection = await connect_to_mongo()
     app.state.users_collection = users_collection
+
+    user_store = UserStore(users_collection)
+    await user_store.ensure_indexes()
+    app.state.user_store = user_store
+
+    product_store = ProductStore(users_collection.database["products"])
+    await product_store.ensure_indexes()
+    app.state.product_store = product_store
+
+    vector_store = VectorStore(users_collection.database["product_vectors"])
+    await vector_store.ensure_indexes()
+    app.state.vector_store = vector_store
+
+    snapshot_store = SnapshotStore(users_collection.database["page_snapshots"])
+    await snapshot_store.ensure_indexes()
+    app.state.snapshot_store = snapshot_store
+
+    app.state.search_flights = SingleFlight()
+    app.state.search_progress = FlightProgress()
+    get_sentiment_cache().attach(users_collection.database["sentiment_cache"])
+
+    browser_pool = None
+    if int(os.getenv("BROWSER_POOL_SIZE", 2)) > 0:
+        browser_pool = BrowserPool()
+        await browser_pool.start()
+    app.state.browser_pool = browser_pool
+
+    search_jobs = SearchJobManager(
+        users_collection.database["search_jobs"],
+        lambda job, on_stage: _run_search_job(app, job, on_stage)
+    )
+    await search_jobs.start()
+    app.state.search_jobs = search_jobs
+
+    warmup = Warmup()
+    app.state.warmup = warmup
+    await warmup.start()
+    logger.info(f"Startup finished in {(time.perf_counter() - startup_started) * 1000:.0f} ms "
+                f"(warm-up mode: {warmup.mode})")
+
     yield
 
+    await warmup.close()
+    await search_jobs.close()
+    await snapshot_store.close()
+    if browser_pool is not None:
+        await browser_pool.close()
+    await close_http_client()
+    shutdown_executors()
+
 app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
@@ -39,6 +123,35 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/api/ready")
+async def readiness_check(request: Request):
+    """Ready once the configured warm-up has finished; 503 until then"""
+    warmup = request.app.state.warmup
+    return JSONResponse(
+        content={"status": "ready" if warmup.ready else warmup.status, "warmup": warmup.stats()},
+        status_code=200 if warmup.ready else 503
+    )
+
+
+@app.get("/api/metrics")
+async def metrics(request: Request):
+    browser_pool = request.app.state.browser_pool
+    return {
+        "browser_pool": browser_pool.stats() if browser_pool else None,
+        "search_flights": request.app.state.search_flights.stats(),
+        "search_jobs": request.app.state.search_jobs.stats(),
+        "scraper": scrape_stats(),
+        "snapshots": request.app.state.snapshot_store.stats(),
+        "executors": executor_stats(),
+        "token_cache": get_token_cache().stats(),
+        "sentiment": sentiment_stats(),
+        "embeddings": embedding_stats(),
+        "vector_cache": request.app.state.vector_store.stats(),
+        "answer_cache": get_answer_cache().stats(),
+        "warmup": request.app.state.warmup.stats(),
+    }
+
+
 @app.post("/api/register")
 async def register(request: Request):
     try:
@@ -47,18 +160,19 @@ async def register(request: Request):
             raise HTTPException(
                 status_code=400, detail="No input data provided")
 
-        users_collection = request.app.state.users_collection
-        existing_user = await users_collection.find_one({"username": data.get("username")})
-        if existing_user:
+        user_store = request.app.state.user_store
+        if await user_store.exists(data.get("username")):
             raise HTTPException(
                 status_code=409, detail="Username already exists")
 
         user = User(
             username=data["username"],
-            password=data["password"]
+            password=await hash_password(data["password"])
         )
 
-        await users_collection.insert_one(user.model_dump())
+        if not await user_store.create(user.model_dump()):
+            raise HTTPException(
+                status_code=409, detail="Username already exists")
 
         return {"message": "User registered successfully", "success": True}
 
@@ -74,12 +188,11 @@ async def login(request: Request):
             raise HTTPException(
                 status_code=400, detail="No input data provided")
 
-        users_collection = request.app.state.users_collection
-        user_data = await users_collection.find_one({"username": data.get("username")})
+        user_data = await request.app.state.user_store.get_credentials(data.get("username"))
         if not user_data:
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        if not check_password_hash(user_data["password"], data.get("password", "")):
+        if not await verify_password(user_data["password"], data.get("password", "")):
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
         token = create_access_token(user_data["username"])
@@ -114,17 +227,16 @@ async def protected_route(current_user: str = Depends(get_current_user)):
 @app.get("/api/mysearches")
 async def get_products(request: Request, current_user: str = Depends(get_current_user)):
     try:
-        users_collection = request.app.state.users_collection
-        user = await users_collection.find_one({"username": current_user})
-        if not user:
+        recent_searches = await request.app.state.user_store.list_recent_searches(current_user)
+        if recent_searches is None:
             raise HTTPException(status_code=404, detail="User not found")
         products = []
-        for search in user.get("recentSearches", []):
+        for search in recent_searches:
             products.append({
                 "product_id": search.get("product_id"),
                 "url": search.get("url"),
-                "name": search.get("product_details", {}).get("name"),
-                "image": search.get("product_details", {}).get("image"),
+                "name": search.get("name"),
+                "image": search.get("image"),
             })
         return {"products": products}
 
@@ -145,21 +257,9 @@ async def delete_product(request: Request, current_user: str = Depends(get_curre
             raise HTTPException(
                 status_code=400, detail="Product ID is required")
 
-        users_collection = request.app.state.users_collection
-        user = await users_collection.find_one({"username": current_user})
-        if not user:
+        if not await request.app.state.user_store.remove_recent_search(current_user, product_id):
             raise HTTPException(status_code=404, detail="User not found")
 
-        recent_searches = user.get("recentSearches", [])
-        updated_searches = [search for search in recent_searches if search.get(
-            "product_id") != product_id]
-
-        await users_collection.update_one(
-            {"username": current_user},
-            {"$set": {"recentSearches": updated_searches}},
-            upsert=True
-        )
-
         return {"message": "Product deleted successfully"}
 
     except Exception as e:
@@ -170,19 +270,21 @@ async def delete_product(request: Request, current_user: str = Depends(get_curre
 async def get_product(request: Request, product_id: str, current_user: str = Depends(get_current_user)):
     """Endpoint to get product details by product ID"""
     try:
-        users_collection = request.app.state.users_collection
-        user = await users_collection.find_one({"username": current_user})
-        if not user:
+        user = await request.app.state.user_store.find_recent_search(current_user, product_id)
+        if user is None:
             raise HTTPException(status_code=404, detail="User not found")
         response = {}
         for recent_search in user.get("recentSearches", []):
             if recent_search.get("product_id") == product_id:
+                analysis = await request.app.state.product_store.get(product_id)
+                if analysis is None:
+                    break
                 response = {
                     "product_id": recent_search["product_id"],
                     "url": recent_search["url"],
-                    "product_details": recent_search["product_details"],
-                    "summary_details": recent_search["review_summary"],
-                    "sentiment_details": recent_search["sentiment_summary"],
+                    "product_details": analysis.product_details.model_dump(),
+                    "summary_details": analysis.review_summary.model_dump(),
+                    "sentiment_details": analysis.sentiment_summary.model_dump(),
                 }
                 return JSONResponse(content=response, status_code=200)
         if not response:
@@ -194,6 +296,160 @@ async def get_product(request: Request, product_id: str, current_user: str = Dep
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+async def _analyze_product(
+    app: FastAPI,
+    product_id: str,
+    url: str,
+    on_stage: Optional[StageCallback] = None,
+    force: bool = False
+) -> Tuple[Optional[ProductAnalysis], Dict[str, Any], int]:
+    """
+    Serve a fresh stored analysis or run the search pipeline and store it.
+    `force` skips the stored analysis.
+    """
+    product_store = app.state.product_store
+    if not force:
+        analysis = await product_store.get_fresh(product_id)
+        if analysis is not None:
+            return analysis, {}, 200
+
+    previous, previous_vectors = None, None
+    if os.getenv("INCREMENTAL_REANALYSIS", "1") == "1":
+        previous = await product_store.get(product_id)
+        if previous is not None:
+            previous_vectors = await app.state.vector_store.load(product_id)
+
+    pipeline = SearchPipeline(
+        url, app.state.browser_pool, on_stage, app.state.snapshot_store, product_id,
+        previous, previous_vectors,
+        on_snapshot_refresh=lambda: _reanalyze_after_refresh(app, product_id, url))
+    response, status_code = await pipeline.execute()
+
+    if status_code != 200:
+        return None, response, status_code
+
+    analysis = ProductAnalysis(
+        product_id=product_id,
+        url=url,
+        product_details=ProductDetails(**response["product_details"]),
+        review_summary=ReviewSummary(**response["summary_details"]),
+        sentiment_summary=SentimentSummary(
+            **response["sentiment_details"]),
+        review_sentiments=response.get("review_sentiments", [])
+    )
+    if response.get("scraped_at") is not None:
+        # An analysis of a stored snapshot is only as recent as the snapshot
+        analysis.analyzed_at = response["scraped_at"]
+    info_docs = [Document(**doc).model_dump()
+                 for doc in response.get("info_docs", [])]
+    # Vectors first, so a stored analysis always has its vectors
+    await app.state.vector_store.save(product_id, EMBEDDING_MODEL_NAME, info_docs)
+    await product_store.save(analysis)
+    return analysis, {}, 200
+
+
+async def _coalesced_analysis(
+    app: FastAPI,
+    product_id: str,
+    url: str,
+    on_stage: Optional[StageCallback] = None,
+    force: bool = False
+) -> Tuple[Optional[ProductAnalysis], Dict[str, Any], int]:
+    """
+    Run `_analyze_product` once per product across concurrent callers.
+    Stage events go to every caller, including ones that join late.
+    """
+    progress = app.state.search_progress
+
+    async def run():
+        try:
+            return await _analyze_product(
+                app, product_id, url, progress.emitter(product_id), force)
+        finally:
+            progress.finish(product_id)
+
+    if on_stage is not None:
+        await progress.subscribe(product_id, on_stage)
+    try:
+        return await app.state.search_flights.do(product_id, run)
+    finally:
+        if on_stage is not None:
+            progress.unsubscribe(product_id, on_stage)
+
+
+async def _reanalyze_after_refresh(app: FastAPI, product_id: str, url: str):
+    """
+    Re-analyse a product once its stale snapshot has been re-scraped. The
+    analysis of the stale snapshot may still be running; wait for it so
+    the re-run is not coalesced into it.
+    """
+    await app.state.search_flights.wait(product_id)
+    logger.info(f"Re-analysing product {product_id} after a snapshot refresh")
+    await _coalesced_analysis(app, product_id, url, force=True)
+
+
+def _product_id_from_url(url: Optional[str]) -> str:
+    if not url:
+        raise HTTPException(status_code=400, detail="URL is required")
+    product_id = product_id_from_url(url)
+    if not product_id:
+        raise HTTPException(status_code=400, detail="Invalid product URL")
+    return product_id
+
+
+async def _search_for_user(
+    app: FastAPI,
+    username: str,
+    product_id: str,
+    url: str,
+    on_stage: Optional[StageCallback] = None
+) -> Tuple[Dict[str, Any], int]:
+    """Analyze a product (or reuse an analysis) and add it to the user's history"""
+    user_store = app.state.user_store
+    existing_user = await user_store.find_recent_search(username, product_id)
+    if existing_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    for recent_search in existing_user.get("recentSearches", []):
+        if recent_search.get("product_id") == product_id:
+            response = {
+                "product_id": recent_search["product_id"],
+                "success": True,
+                "url": recent_search["url"],
+            }
+            return response, 200
+
+    if not url.startswith(("http://", "https://")):
+        raise HTTPException(status_code=400, detail="Invalid URL format")
+
+    analysis, response, status_code = await _coalesced_analysis(app, product_id, url, on_stage)
+    if analysis is None:
+        return response, status_code
+
+    recent_search = RecentSearch(
+        product_id=product_id,
+        url=url,
+        name=analysis.product_details.name,
+        image=analysis.product_details.image
+    )
+
+    await user_store.add_recent_search(username, recent_search.model_dump())
+
+    response = {
+        "product_id": product_id,
+        "url": url,
+        "success": True
+    }
+    return jsonable_encoder(response), 200
+
+
+async def _run_search_job(app: FastAPI, job: Dict[str, Any], on_stage: StageCallback) -> Tuple[Dict[str, Any], int]:
+    try:
+        return await _search_for_user(app, job["username"], job["product_id"], job["url"], on_stage)
+    except HTTPException as e:
+        return {"error": e.detail}, e.status_code
+
+
 @app.post("/api/search")
 async def search(request: Request, current_user: str = Depends(get_current_user)):
     """Endpoint for product search and analysis"""
@@ -204,75 +460,65 @@ async def search(request: Request, current_user: str = Depends(get_current_user)
                 status_code=400, detail="No input data provided")
 
         url = data.get("url")
-        if not url:
-            raise HTTPException(status_code=400, detail="URL is required")
-        match = re.search(r"/dp/([A-Z0-9]{10})", url)
-        if match:
-            product_id = match.group(1)
-        else:
-            raise HTTPException(status_code=400, detail="Invalid Amazon URL")
-
-        users_collection = request.app.state.users_collection
-        existing_user = await users_collection.find_one({"username": current_user})
-        if not existing_user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        for recent_search in existing_user.get("recentSearches", []):
-            if recent_search.get("product_id") == product_id:
-                response = {
-                    "product_id": recent_search["product_id"],
-                    "success": True,
-                    "url": recent_search["url"],
-                }
-                return JSONResponse(content=response, status_code=200)
+        product_id = _product_id_from_url(url)
+        response, status_code = await _search_for_user(
+            request.app, current_user, product_id, url)
+        return JSONResponse(content=response, status_code=status_code)
 
-        if not url.startswith(("http://", "https://")):
-            raise HTTPException(status_code=400, detail="Invalid URL format")
-
-        pipeline = SearchPipeline(url)
-        response, status_code = await pipeline.execute()
-
-        if status_code != 200:
-            return JSONResponse(content=response, status_code=status_code)
-
-        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
 
-        recent_search = RecentSearch(
-            product_id=product_id,
-            url=url,
-            product_details=ProductDetails(**response["product_details"]),
-            review_summary=ReviewSummary(**response["summary_details"]),
-            sentiment_summary=SentimentSummary(
-                **response["sentiment_details"]),
-            info_docs=[Document(**doc)
-                       for doc in response.get("info_docs", [])]
-        )
 
-        recent_searches = existing_user.get("recentSearches", [])
-        if len(recent_searches) >= int(os.getenv("MAX_RECENT_SEARCHES", 5)):
-            recent_searches.pop(0)
+@app.post("/api/search/jobs")
+async def submit_search_job(request: Request, current_user: str = Depends(get_current_user)):
+    """Queue a product search and return its job ID without waiting for it"""
+    try:
+        data = await request.json()
+        if not data:
+            raise HTTPException(
+                status_code=400, detail="No input data provided")
 
-        recent_searches.append(recent_search.model_dump())
+        url = data.get("url")
+        product_id = _product_id_from_url(url)
+        if not url.startswith(("http://", "https://")):
+            raise HTTPException(status_code=400, detail="Invalid URL format")
 
-        await users_collection.update_one(
-            {"username": current_user},
-            {"$set": {"recentSearches": recent_searches}},
-            upsert=True
+        job_id = await request.app.state.search_jobs.submit(current_user, product_id, url)
+        return JSONResponse(
+            content={"job_id": job_id, "status": "queued", "success": True},
+            status_code=202
         )
 
-        response = {
-            "product_id": product_id,
-            "url": url,
-            "success": True
-        }
-        return JSONResponse(content=jsonable_encoder(response))
-
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/api/search/jobs/{job_id}")
+async def get_search_job(request: Request, job_id: str, current_user: str = Depends(get_current_user)):
+    """Poll the status, stage timings and result of a search job"""
+    job = await request.app.state.search_jobs.get(job_id, current_user)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse(content=jsonable_encoder(job))
+
+
+@app.get("/api/search/jobs/{job_id}/events")
+async def search_job_events(request: Request, job_id: str, current_user: str = Depends(get_current_user)):
+    """Server-Sent Events stream of a search job's stage transitions"""
+    search_jobs = request.app.state.search_jobs
+    if not await search_jobs.get(job_id, current_user):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        search_jobs.stream(job_id, current_user, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/api/query")
 async def query(request: Request, current_user: str = Depends(get_current_user)):
     """Endpoint for querying the database"""
@@ -282,12 +528,12 @@ async def query(request: Request, current_user: str = Depends(get_current_user))
             raise HTTPException(
                 status_code=400, detail="No input data provided")
         product_id = data.get("product_id")
-        users_collection = request.app.state.users_collection
         query_response = await handle_query(
             data.get("query"),
             product_id,
-            users_collection,
-            current_user
+            request.app.state.user_store,
+            current_user,
+            request.app.state.vector_store
         )
         if not query_response:
             raise HTTPException(status_code=404, detail="No response found")
@@ -297,6 +543,52 @@ async def query(request: Request, current_user: str = Depends(get_current_user))
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.post("/api/query/stream")
+async def query_stream(request: Request, current_user: str = Depends(get_current_user)):
+    """Endpoint for querying a product with the answer streamed as Server-Sent Events"""
+    try:
+        data = await request.json()
+        if not data:
+            raise HTTPException(
+                status_code=400, detail="No input data provided")
+        user_query = data.get("query")
+        prepared = await prepare_query(
+            user_query,
+            data.get("product_id"),
+            request.app.state.user_store,
+            current_user,
+            request.app.state.vector_store
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    async def events():
+        tokens = stream_query_answer(user_query, prepared)
+        answer = []
+        try:
+            async for token in tokens:
+                if await request.is_disconnected():
+                    logger.info("Client disconnected, cancelling answer stream")
+                    return
+                answer.append(token)
+                yield format_sse("token", {"token": token})
+            yield format_sse("done", {"answer": "".join(answer)})
+        except Exception as e:
+            logger.error(f"Answer streaming failed: {e}", exc_info=True)
+            yield format_sse("error", {"detail": "Failed to generate response"})
+        finally:
+            await tokens.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 if __name__ == '__main__':
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=5000, reload=True)
@@ -0,0 +1,98 @@
+"""
+Login throughput benchmark.
+
+Fires concurrent /api/login requests at a running server while probing
+/api/health, to show both login throughput and whether password hashing
+stalls the event loop for everyone else.
+
+    python -m benchmarks.login_benchmark --url http://localhost:5000 --requests 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import List
+import httpx
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _report(name: str, samples: List[float]):
+    if not samples:
+        print(f"{name}: no successful requests")
+        return
+    print(f"{name}: n={len(samples)} "
+          f"mean={statistics.mean(samples):.1f}ms "
+          f"p50={_percentile(samples, 50):.1f}ms "
+          f"p95={_percentile(samples, 95):.1f}ms "
+          f"max={max(samples):.1f}ms")
+
+
+async def _login_worker(client: httpx.AsyncClient, credentials: dict, remaining: List[int],
+                        latencies: List[float], failures: List[int]):
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        started = time.perf_counter()
+        response = await client.post("/api/login", json=credentials)
+        if response.status_code == 200:
+            latencies.append((time.perf_counter() - started) * 1000)
+        else:
+            failures[0] += 1
+
+
+async def _health_probe(client: httpx.AsyncClient, stop: asyncio.Event, latencies: List[float]):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/api/health")
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.05)
+
+
+async def run(url: str, total: int, concurrency: int, username: str, password: str):
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        await client.post("/api/register", json={"username": username, "password": password})
+        credentials = {"username": username, "password": password}
+
+        login_latencies: List[float] = []
+        health_latencies: List[float] = []
+        failures = [0]
+        remaining = [total]
+        stop = asyncio.Event()
+
+        probe = asyncio.create_task(_health_probe(client, stop, health_latencies))
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _login_worker(client, credentials, remaining, login_latencies, failures)
+            for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+
+    print(f"{len(login_latencies)} logins in {elapsed:.2f}s "
+          f"({len(login_latencies) / elapsed:.1f}/s), {failures[0]} failed, "
+          f"concurrency {concurrency}")
+    _report("login", login_latencies)
+    _report("health during logins", health_latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--username", default=f"bench-{uuid.uuid4().hex[:8]}")
+    parser.add_argument("--password", default="bench-password")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.requests, args.concurrency, args.username, args.password))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Move product analyses and their chunk vectors out of user documents.
+
+Each embedded recentSearches entry is split into a shared `products`
+document, a packed float32 `product_vectors` document and a lightweight
+reference that stays in the user's history. Safe to run more than once.
+
+Usage (from the server directory):
+    python -m migrations.split_info_docs
+"""
+import asyncio
+import logging
+from datetime import timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from models.embedding_processor import EMBEDDING_MODEL_NAME
+from schemas.product import ProductAnalysis
+from schemas.user import RecentSearch
+from util.db import connect_to_mongo
+from util.product_store import ProductStore
+from util.vector_store import VectorStore
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def migrate_user(user, users_collection, product_store: ProductStore, vector_store: VectorStore) -> int:
+    references = []
+    moved = 0
+    for search in user.get("recentSearches", []):
+        if "product_details" not in search:
+            references.append(search)
+            continue
+
+        product_id = search["product_id"]
+        analyzed_at = search.get("created_at")
+        if analyzed_at is not None and analyzed_at.tzinfo is None:
+            analyzed_at = analyzed_at.replace(tzinfo=timezone.utc)
+
+        stored = await product_store.get(product_id)
+        if stored is None or (analyzed_at and stored.analyzed_at.replace(tzinfo=timezone.utc) < analyzed_at):
+            analysis = ProductAnalysis(
+                product_id=product_id,
+                url=search["url"],
+                product_details=search["product_details"],
+                review_summary=search["review_summary"],
+                sentiment_summary=search["sentiment_summary"],
+                **({"analyzed_at": analyzed_at} if analyzed_at else {})
+            )
+            if search.get("info_docs"):
+                await vector_store.save(product_id, EMBEDDING_MODEL_NAME, search["info_docs"])
+            await product_store.save(analysis)
+
+        reference = RecentSearch(
+            product_id=product_id,
+            url=search["url"],
+            name=search["product_details"].get("name", ""),
+            image=search["product_details"].get("image", ""),
+        ).model_dump()
+        if search.get("created_at"):
+            reference["created_at"] = search["created_at"]
+        references.append(reference)
+        moved += 1
+
+    if moved:
+        await users_collection.update_one(
+            {"_id": user["_id"]},
+            {"$set": {"recentSearches": references}}
+        )
+    return moved
+
+
+async def main():
+    users_collection = await connect_to_mongo()
+    db = users_collection.database
+    product_store = ProductStore(db["products"])
+    vector_store = VectorStore(db["product_vectors"])
+    await product_store.ensure_indexes()
+    await vector_store.ensure_indexes()
+
+    users = moved = 0
+    async for user in users_collection.find({"recentSearches.product_details": {"$exists": True}}):
+        moved += await migrate_user(user, users_collection, product_store, vector_store)
+        users += 1
+    logger.info(f"Migrated {moved} searches across {users} users")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
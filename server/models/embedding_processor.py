@@ -1,22 +1,37 @@
-from typing import List, Tuple, Dict, Set
+from typing import TYPE_CHECKING, List, Tuple, Dict, Optional, Set
+import hashlib
 import logging
-from langchain.docstore.document import Document as LangchainDocument
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from transformers import AutoTokenizer
+import os
+import numpy as np
 from functools import lru_cache
+from util.cache import LRUCache
+from util.micro_batcher import MicroBatcher
+
+# langchain and transformers (which pulls in torch) are imported where
+# they are first used, so importing this module stays cheap
+if TYPE_CHECKING:
+    from langchain.docstore.document import Document as LangchainDocument
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL_NAME = "thenlper/gte-small"
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", 64))
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 1024))
+QUERY_BATCH_MAX_LATENCY_MS = float(os.getenv("QUERY_BATCH_MAX_LATENCY_MS", 5))
+
 
 @lru_cache(maxsize=1)
 def get_tokenizer(tokenizer_name: str):
+    from transformers import AutoTokenizer
+
     return AutoTokenizer.from_pretrained(tokenizer_name,cache_dir="./hf_cache")
 
 
 @lru_cache(maxsize=1)
 def get_embedding_model(model_name: str):
+    from langchain_huggingface import HuggingFaceEmbeddings
+
     return HuggingFaceEmbeddings(
         model_name=model_name,
         encode_kwargs={"normalize_embeddings": True},
@@ -24,14 +39,26 @@ def get_embedding_model(model_name: str):
     )
 
 
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> LRUCache:
+    """Chunk vectors keyed by (model, text hash), stored as packed float32"""
+    return LRUCache(max_bytes=int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024), sizeof=len)
+
+
+def _chunk_key(model_name: str, text: str) -> Tuple[str, str]:
+    return model_name, hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
 def split_documents(
     chunk_size: int,
-    raw_documents: List[LangchainDocument],
+    raw_documents: List["LangchainDocument"],
     tokenizer_name: str
-) -> List[LangchainDocument]:
+) -> List["LangchainDocument"]:
     """
     Optimized document splitting with caching and efficient deduplication.
     """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
     # Get cached tokenizer
     tokenizer = get_tokenizer(tokenizer_name)
 
@@ -49,7 +76,7 @@ def split_documents(
     )
 
     seen: Set[str] = set()
-    unique_docs: List[LangchainDocument] = []
+    unique_docs: List["LangchainDocument"] = []
 
     for doc in raw_documents:
         chunks = text_splitter.split_documents([doc])
@@ -63,38 +90,67 @@ def split_documents(
 
 
 def generate_embeddings(
-    docs: List[LangchainDocument],
-    model_name: str = "thenlper/gte-small"
+    docs: List["LangchainDocument"],
+    model_name: str = EMBEDDING_MODEL_NAME
 ) -> List[List[float]]:
     """
     Optimized embedding generation with caching and batch processing.
+    Only chunks missing from the embedding cache are encoded.
     """
-    embedding_model = get_embedding_model(model_name)
-
-    logger.info("Generating embeddings...")
+    cache = get_embedding_cache()
     contents = [doc.page_content for doc in docs]
-    embeddings = embedding_model.embed_documents(contents)
+    keys = [_chunk_key(model_name, content) for content in contents]
+    packed = [cache.get(key) for key in keys]
+
+    misses = {}
+    for key, content, vector in zip(keys, contents, packed):
+        if vector is None:
+            misses.setdefault(key, content)
+
+    if misses:
+        embedding_model = get_embedding_model(model_name)
+        logger.info("Generating embeddings...")
+        encoded = embedding_model.embed_documents(list(misses.values()))
+        fresh = {
+            key: np.asarray(embedding, dtype=np.float32).tobytes()
+            for key, embedding in zip(misses, encoded)
+        }
+        for key, vector in fresh.items():
+            cache.put(key, vector)
+        packed = [vector if vector is not None else fresh[key]
+                  for key, vector in zip(keys, packed)]
+
+    embeddings = [np.frombuffer(vector, dtype=np.float32).tolist()
+                  for vector in packed]
     logger.info(
-        f"Generated {len(embeddings)} embeddings using model {model_name}")
+        f"Generated {len(misses)} of {len(embeddings)} embeddings using model {model_name}")
     return embeddings
 
 
 def embed_documents(
     data: List[str],  # Changed from dict to List[str] based on usage
-    tokenizer_name: str = "thenlper/gte-small",
-    chunk_size: int = 512
+    tokenizer_name: str = EMBEDDING_MODEL_NAME,
+    chunk_size: int = 512,
+    sources: Optional[List[str]] = None
 ) -> List[Dict[str, object]]:
     """
     Optimized full pipeline with better type hints and logging.
+    When `sources` is given (one ID per input text), each chunk records
+    the ID of the text it was split from under "source".
     """
-    raw_docs = [LangchainDocument(page_content=text) for text in data]
+    from langchain.docstore.document import Document as LangchainDocument
+
+    raw_docs = [
+        LangchainDocument(page_content=text, metadata={"source": source})
+        for text, source in zip(data, sources or [None] * len(data))
+    ]
     logger.info(f"Loaded {len(raw_docs)} raw documents.")
 
     split_docs = split_documents(chunk_size, raw_docs, tokenizer_name)
     embeddings = generate_embeddings(split_docs, model_name=tokenizer_name)
 
     info_docs = [
-        {"doc_text": doc.page_content, "vectors": emb}
+        {"doc_text": doc.page_content, "vectors": emb, "source": doc.metadata.get("source")}
         for doc, emb in zip(split_docs, embeddings)
         if doc.page_content and emb is not None
     ]
@@ -103,14 +159,69 @@ def embed_documents(
     return info_docs
 
 
+@lru_cache(maxsize=1)
+def get_query_cache() -> LRUCache:
+    return LRUCache(max_entries=QUERY_EMBEDDING_CACHE_SIZE)
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form used to embed and cache queries"""
+    return " ".join(query.split()).lower()
+
+
+def embed_queries(
+    queries: List[str],
+    tokenizer_name: str = EMBEDDING_MODEL_NAME
+) -> List[List[float]]:
+    """
+    Embed several normalized queries in one encoder forward pass and
+    memoize the results.
+    """
+    embedding_model = get_embedding_model(tokenizer_name)
+    embeddings = embedding_model.embed_documents(queries)
+    cache = get_query_cache()
+    for query, embedding in zip(queries, embeddings):
+        cache.put((tokenizer_name, query), embedding)
+    logger.info(f"Generated {len(embeddings)} query embeddings")
+    return embeddings
+
+
 def embed_query(
     query: str,
-    tokenizer_name: str = "thenlper/gte-small"
+    tokenizer_name: str = EMBEDDING_MODEL_NAME
 ) -> List[float]:
     """
-    Optimized query embedding generation.
+    Optimized query embedding generation, memoized on the normalized text.
     """
-    embedding_model = get_embedding_model(tokenizer_name)
-    query_embedding = embedding_model.embed_query(query)
-    logger.info(f"Generated query embedding for: {query}")
-    return query_embedding
\ No newline at end of file
+    query = normalize_query(query)
+    cached = get_query_cache().get((tokenizer_name, query))
+    if cached is not None:
+        return cached
+    return embed_queries([query], tokenizer_name)[0]
+
+
+@lru_cache(maxsize=1)
+def get_query_batcher() -> MicroBatcher:
+    """Shares one forward pass between queries arriving within a few ms"""
+    return MicroBatcher(
+        embed_queries,
+        max_batch_size=32,
+        max_latency_ms=QUERY_BATCH_MAX_LATENCY_MS
+    )
+
+
+async def embed_query_async(query: str) -> List[float]:
+    """embed_query for async callers: cache hits skip the model pool entirely"""
+    query = normalize_query(query)
+    cached = get_query_cache().get((EMBEDDING_MODEL_NAME, query))
+    if cached is not None:
+        return cached
+    return (await get_query_batcher().submit([query]))[0]
+
+
+def embedding_stats() -> Dict[str, Dict[str, float]]:
+    return {
+        "chunk_cache": get_embedding_cache().stats(),
+        "query_cache": get_query_cache().stats(),
+        "query_batcher": get_query_batcher().stats(),
+    }
@@ -1,12 +1,14 @@
-from typing import List, Dict
+from typing import AsyncIterator, List, NamedTuple, Optional
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from huggingface_hub import InferenceClient
+from huggingface_hub import AsyncInferenceClient
 import os
 from fastapi import HTTPException
 import logging
+from contextlib import aclosing
 from functools import lru_cache
-from models.embedding_processor import embed_query
+from models.embedding_processor import embed_query_async
+from util.executor import run_model, get_inference_limiter
+from util.answer_cache import SemanticAnswerCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,35 +18,52 @@ HF_TOKEN = os.getenv("HF_TOKEN")
 
 @lru_cache(maxsize=1)
 def get_inference_client():
-    return InferenceClient(
+    return AsyncInferenceClient(
         model="mistralai/Mistral-7B-Instruct-v0.3",
         token=HF_TOKEN
     )
 
 
-def similarity_search(user_query: str, info_docs: List[Dict[str, object]], k: int = 7) -> List[str]:
+@lru_cache(maxsize=1)
+def get_answer_cache() -> SemanticAnswerCache:
+    return SemanticAnswerCache()
+
+
+def _rank_documents(query_embedding: List[float], doc_vectors: np.ndarray, doc_texts: List[str], k: int) -> List[str]:
+    # Embeddings are L2-normalized, so a dot product is the cosine similarity
+    similarities = doc_vectors @ np.asarray(query_embedding, dtype=np.float32)
+    k = min(k, len(similarities))
+    top_k_indices = np.argpartition(similarities, -k)[-k:]
+    top_k_indices = top_k_indices[np.argsort(
+        similarities[top_k_indices])[::-1]]
+
+    return [doc_texts[i] for i in top_k_indices]
+
+
+async def similarity_search(
+    user_query: str,
+    doc_vectors: np.ndarray,
+    doc_texts: List[str],
+    k: int = 7,
+    query_embedding: Optional[List[float]] = None
+) -> List[str]:
     """
     Optimized cosine similarity search using pre-computed document vectors
 
     Args:
         user_query: Query string to search for
-        info_docs: List of {"document_text": str, "vector": List[float]}
+        doc_vectors: (n x dim) float32 matrix of chunk embeddings
+        doc_texts: Chunk texts, one per matrix row
         k: Number of top results to return
+        query_embedding: Precomputed embedding of user_query, if available
 
     Returns:
         List of top k document texts sorted by relevance
     """
     try:
-        query_embedding = embed_query(user_query)
-        query_vector = np.array(query_embedding, ndmin=2)
-        doc_vectors = np.array([doc["vectors"] for doc in info_docs])
-        doc_texts = [doc["doc_text"] for doc in info_docs]
-        similarities = cosine_similarity(query_vector, doc_vectors)
-        top_k_indices = np.argpartition(similarities[0], -k)[-k:]
-        top_k_indices = top_k_indices[np.argsort(
-            similarities[0][top_k_indices])[::-1]]
-
-        return [doc_texts[i] for i in top_k_indices]
+        if query_embedding is None:
+            query_embedding = await embed_query_async(user_query)
+        return await run_model(_rank_documents, query_embedding, doc_vectors, doc_texts, k)
 
     except Exception as e:
         logger.error(f"Similarity search error: {str(e)}", exc_info=True)
@@ -54,20 +73,14 @@ def similarity_search(user_query: str, info_docs: List[Dict[str, object]], k: in
         )
 
 
-def generate_response(user_query: str, retrieved_docs: List[str]) -> str:
-    """
-    Generate response using LLM with optimized prompt construction
-    """
-    try:
-        client = get_inference_client()
-
-        context = "\n".join([
-            "Extracted Documents:",
-            *retrieved_docs,
-            f"\nQuestion: {user_query}"
-        ])
+def _build_prompt(user_query: str, retrieved_docs: List[str]) -> str:
+    context = "\n".join([
+        "Extracted Documents:",
+        *retrieved_docs,
+        f"\nQuestion: {user_query}"
+    ])
 
-        prompt = f"""Using the information from reviews and product features below, 
+    return f"""Using the information from reviews and product features below, 
         provide a concise answer to the question. If the information isn't sufficient, 
         respond politely without mentioning lack of context.
 
@@ -75,11 +88,21 @@ def generate_response(user_query: str, retrieved_docs: List[str]) -> str:
         {context}
         """
 
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=500,
-            temperature=0.3
-        )
+
+async def generate_response(user_query: str, retrieved_docs: List[str]) -> str:
+    """
+    Generate response using LLM with optimized prompt construction
+    """
+    try:
+        client = get_inference_client()
+        prompt = _build_prompt(user_query, retrieved_docs)
+
+        async with get_inference_limiter():
+            response = await client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=500,
+                temperature=0.3
+            )
 
         return response.choices[0].message["content"]
 
@@ -91,37 +114,99 @@ def generate_response(user_query: str, retrieved_docs: List[str]) -> str:
         )
 
 
+async def generate_response_stream(user_query: str, retrieved_docs: List[str]) -> AsyncIterator[str]:
+    """
+    Stream response tokens from the LLM as the backend produces them.
+    Closing the generator cancels the underlying request.
+    """
+    client = get_inference_client()
+    prompt = _build_prompt(user_query, retrieved_docs)
+
+    async with get_inference_limiter():
+        stream = await client.chat.completions.create(
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=500,
+            temperature=0.3,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class PreparedQuery(NamedTuple):
+    product_id: str
+    version: object
+    query_embedding: List[float]
+    cached_answer: Optional[str]
+    retrieved_docs: List[str]
+
+
+async def prepare_query(
+    user_query: str,
+    product_id: str,
+    user_store,
+    current_user: str,
+    vector_store
+) -> PreparedQuery:
+    """
+    Validate access to the product, embed the query and either find a
+    cached answer or retrieve the context documents for the LLM
+    """
+    user = await user_store.find_recent_search(current_user, product_id)
+
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    product = next(
+        (item for item in user.get("recentSearches", [])
+         if item.get("product_id") == product_id),
+        None
+    )
+
+    vectors = await vector_store.load(product_id) if product else None
+    if not vectors:
+        raise HTTPException(
+            status_code=404, detail="Product not found or has no documents")
+
+    query_embedding = await embed_query_async(user_query)
+    answer = get_answer_cache().lookup(product_id, vectors.version, query_embedding)
+    if answer is not None:
+        logger.info(f"Semantic answer cache hit for product {product_id}")
+        return PreparedQuery(product_id, vectors.version, query_embedding, answer, [])
+
+    retrieved_docs = await similarity_search(
+        user_query, vectors.matrix, vectors.texts, k=7,
+        query_embedding=query_embedding)
+    return PreparedQuery(product_id, vectors.version, query_embedding, None, retrieved_docs)
+
+
+def _remember_answer(prepared: PreparedQuery, user_query: str, answer: str):
+    get_answer_cache().store(
+        prepared.product_id, prepared.version, prepared.query_embedding, answer)
+    logger.info(
+        f"Answered query for product {prepared.product_id}: {user_query!r} ({len(answer)} chars)")
+
+
 async def handle_query(
     user_query: str,
     product_id: str,
-    users_collection,
-    current_user: str
+    user_store,
+    current_user: str,
+    vector_store
 ) -> str:
     """
     Optimized query handler with better error handling
     """
     try:
-        user = await users_collection.find_one(
-            {"username": current_user},
-            {"recentSearches": 1}
-        )
-
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        prepared = await prepare_query(
+            user_query, product_id, user_store, current_user, vector_store)
+        if prepared.cached_answer is not None:
+            return prepared.cached_answer
 
-        product = next(
-            (item for item in user.get("recentSearches", [])
-             if item.get("product_id") == product_id),
-            None
-        )
-
-        if not product or not product.get('info_docs'):
-            raise HTTPException(
-                status_code=404, detail="Product not found or has no documents")
-
-        retrieved_docs = similarity_search(
-            user_query, product['info_docs'], k=7)
-        return generate_response(user_query, retrieved_docs)
+        answer = await generate_response(user_query, prepared.retrieved_docs)
+        _remember_answer(prepared, user_query, answer)
+        return answer
 
     except HTTPException:
         raise
@@ -131,3 +216,26 @@ async def handle_query(
             status_code=500,
             detail="Failed to process query"
         )
+
+
+async def stream_query_answer(user_query: str, prepared: PreparedQuery) -> AsyncIterator[str]:
+    """
+    Yield answer tokens for a prepared query. The assembled answer is
+    cached and logged only when the stream completes; a stream closed
+    early (client disconnect) leaves no partial answer behind.
+    """
+    if prepared.cached_answer is not None:
+        yield prepared.cached_answer
+        return
+
+    tokens = []
+    # Closed explicitly so a disconnect releases the backend stream and
+    # the inference slot at once, not when the generator is collected
+    async with aclosing(generate_response_stream(user_query, prepared.retrieved_docs)) as stream:
+        async for token in stream:
+            tokens.append(token)
+            yield token
+    if not tokens:
+        logger.warning(f"Empty answer streamed for product {prepared.product_id}; not caching it")
+        return
+    _remember_answer(prepared, user_query, "".join(tokens))
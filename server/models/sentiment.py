@@ -1,88 +1,244 @@
-from huggingface_hub import InferenceClient
-from typing import List, Dict
+from huggingface_hub import AsyncInferenceClient
+from typing import List, Dict, Tuple
+from functools import lru_cache
+from util.executor import get_inference_limiter
+from util.micro_batcher import MicroBatcher
+from util.sentiment_cache import SentimentCache
+import asyncio
+import logging
 import os
 
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
+MAX_REVIEW_CHARS = 1000
+# "api" (HF Inference API), "local" (torch on CPU) or "onnx" (onnxruntime)
+SENTIMENT_ENGINE = os.getenv("SENTIMENT_ENGINE", "api").lower()
+SENTIMENT_INT8 = os.getenv("SENTIMENT_INT8", "false").lower() in ("1", "true", "yes")
+SENTIMENT_MAX_BATCH = int(os.getenv("SENTIMENT_MAX_BATCH", 32))
+SENTIMENT_MAX_LATENCY_MS = float(os.getenv("SENTIMENT_MAX_LATENCY_MS", 10))
+LOCAL_LABELS = ("negative", "neutral", "positive")
+SENTIMENT_CONCURRENCY = int(os.getenv("SENTIMENT_CONCURRENCY", 8))
+SENTIMENT_RETRIES = int(os.getenv("SENTIMENT_RETRIES", 2))
+SENTIMENT_RETRY_BACKOFF = float(os.getenv("SENTIMENT_RETRY_BACKOFF", 0.5))
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", 50000))
+
+
+@lru_cache(maxsize=1)
+def get_sentiment_client() -> AsyncInferenceClient:
+    return AsyncInferenceClient(model=MODEL_NAME, token=os.getenv("HF_TOKEN"))
+
+
+def _load_onnx_model():
+    """Export the model to ONNX once, optionally with dynamic int8 quantization"""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    export_dir = os.path.join("./hf_cache", "onnx", MODEL_NAME.replace("/", "--"))
+    if not os.path.isdir(export_dir):
+        model = ORTModelForSequenceClassification.from_pretrained(
+            MODEL_NAME, export=True, cache_dir="./hf_cache")
+        model.save_pretrained(export_dir)
+    if not SENTIMENT_INT8:
+        return ORTModelForSequenceClassification.from_pretrained(export_dir)
+
+    quantized_dir = export_dir + "-int8"
+    if not os.path.isdir(quantized_dir):
+        quantizer = ORTQuantizer.from_pretrained(export_dir)
+        quantizer.quantize(
+            save_dir=quantized_dir,
+            quantization_config=AutoQuantizationConfig.avx2(
+                is_static=False, per_channel=False)
+        )
+    return ORTModelForSequenceClassification.from_pretrained(
+        quantized_dir, file_name="model_quantized.onnx")
+
+
+@lru_cache(maxsize=1)
+def get_local_sentiment_model():
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    import torch
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, cache_dir="./hf_cache")
+    if SENTIMENT_ENGINE == "onnx":
+        return tokenizer, _load_onnx_model()
+
+    model = AutoModelForSequenceClassification.from_pretrained(
+        MODEL_NAME, cache_dir="./hf_cache")
+    model.eval()
+    if SENTIMENT_INT8:
+        model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
+
+
+def _classify_batch_local(texts: List[str]) -> List[Tuple[str, float]]:
+    """One padded forward pass over a batch of reviews"""
+    import torch
+
+    tokenizer, model = get_local_sentiment_model()
+    encoded = tokenizer(texts, return_tensors="pt", padding=True,
+                        truncation=True, max_length=512)
+    with torch.no_grad():
+        logits = model(**encoded).logits
+    scores, labels = torch.softmax(logits, dim=-1).max(dim=-1)
+    return [(LOCAL_LABELS[label], float(score))
+            for label, score in zip(labels.tolist(), scores.tolist())]
+
+
+@lru_cache(maxsize=1)
+def get_sentiment_batcher() -> MicroBatcher:
+    """Merges reviews from concurrent searches into shared forward passes"""
+    return MicroBatcher(
+        _classify_batch_local,
+        max_batch_size=SENTIMENT_MAX_BATCH,
+        max_latency_ms=SENTIMENT_MAX_LATENCY_MS
+    )
+
+
+@lru_cache(maxsize=1)
+def get_sentiment_cache() -> SentimentCache:
+    return SentimentCache(max_entries=SENTIMENT_CACHE_SIZE)
+
+
+def _model_identity() -> str:
+    """Engines can label differently, so each gets its own cache namespace"""
+    identity = f"{MODEL_NAME}@{SENTIMENT_ENGINE}"
+    if SENTIMENT_ENGINE != "api" and SENTIMENT_INT8:
+        identity += "-int8"
+    return identity
+
+
+async def _classify(texts: List[str]) -> List[Tuple[str, float]]:
+    if SENTIMENT_ENGINE == "api":
+        return await _classify_batch_remote(texts)
+    return await get_sentiment_batcher().submit(texts)
+
+
+async def _classify_cached(texts: List[str]) -> List[Tuple[str, float]]:
+    """Classify only reviews whose (model, text) hash is not cached yet"""
+    cache = get_sentiment_cache()
+    model = _model_identity()
+    keys = [SentimentCache.key(model, text) for text in texts]
+    known = await cache.get_many(set(keys))
+
+    new_texts = {}
+    for key, text in zip(keys, texts):
+        if key not in known:
+            new_texts.setdefault(key, text)
+    if new_texts:
+        fresh = dict(zip(new_texts, await _classify(list(new_texts.values()))))
+        await cache.put_many(model, fresh)
+        known.update(fresh)
+
+    return [known[key] for key in keys]
+
+
+def _bucket(label: str) -> str:
+    if "negative" in label:
+        return "negative"
+    if "neutral" in label:
+        return "neutral"
+    return "positive"
+
+
+def aggregate_sentiment(predictions: List[Tuple[str, float]]) -> Dict[str, float]:
+    """Tally (label, score) predictions in review order"""
+    results = {"positive": 0, "negative": 0, "neutral": 0, "scores": []}
+    for label, score in predictions:
+        results[_bucket(label)] += 1
+        results["scores"].append(score)
 
-def analyze_sentiment(reviews: List[str]) -> Dict[str, float]:
+    results["avg_score"] = (
+        sum(results["scores"]) /
+        len(results["scores"]) if results["scores"] else 0.0
+    )
+    return results
+
+
+def update_sentiment_summary(
+    previous: Dict[str, float],
+    removed: List[Tuple[str, float]],
+    added: List[Tuple[str, float]],
+    scores: List[float]
+) -> Dict[str, float]:
     """
-    Analyze sentiment via Hugging Face Inference API
+    Apply removed and added predictions to a previous summary without
+    re-tallying it. `scores` is the current per-review list, in order.
     """
-    MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
-    client = InferenceClient(
-        model=MODEL_NAME, token=os.getenv("HF_TOKEN")
-    )
-    results = {"positive": 0, "negative": 0, "neutral": 0, "scores": []}
-    MAX_REVIEW_CHARS = 1000
+    results = {key: previous[key] for key in ("positive", "negative", "neutral")}
+    total = previous["avg_score"] * len(previous["scores"])
+    for label, score in removed:
+        results[_bucket(label)] -= 1
+        total -= score
+    for label, score in added:
+        results[_bucket(label)] += 1
+        total += score
+
+    results["scores"] = scores
+    results["avg_score"] = total / len(scores) if scores else 0.0
+    return results
+
+
+async def _classify_remote(text: str) -> Tuple[str, float]:
+    """Classify one review, retrying transient failures with backoff"""
+    client = get_sentiment_client()
+    for attempt in range(SENTIMENT_RETRIES + 1):
+        try:
+            async with get_inference_limiter():
+                response = await client.text_classification(text)
+            top_result = response[0]
+            return top_result.label.lower(), top_result.score
+        except Exception as e:
+            if attempt == SENTIMENT_RETRIES:
+                raise
+            logger.warning(
+                f"Sentiment request failed (attempt {attempt + 1}): {e}")
+            await asyncio.sleep(SENTIMENT_RETRY_BACKOFF * 2 ** attempt)
+
+
+async def _classify_batch_remote(texts: List[str]) -> List[Tuple[str, float]]:
+    """
+    The Inference API classifies one input per request, so a batch is
+    fanned out as concurrent requests over the shared client.
+    """
+    semaphore = asyncio.Semaphore(SENTIMENT_CONCURRENCY)
+
+    async def classify(text: str) -> Tuple[str, float]:
+        async with semaphore:
+            return await _classify_remote(text)
+
+    tasks = [asyncio.create_task(classify(text)) for text in texts]
     try:
-        for review in reviews:
-            truncated_review = review[:MAX_REVIEW_CHARS]
-            response = client.text_classification(truncated_review)
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
 
-            top_result = response[0]
-            label = top_result.label.lower()
-            score = top_result.score
 
-            if "negative" in label:
-                results["negative"] += 1
-            elif "neutral" in label:
-                results["neutral"] += 1
-            else:
-                results["positive"] += 1
+async def classify_reviews(reviews: List[str]) -> List[Tuple[str, float]]:
+    """(label, score) per review, in order"""
+    return await _classify_cached([review[:MAX_REVIEW_CHARS] for review in reviews])
 
-            results["scores"].append(score)
 
-        results["avg_score"] = (
-            sum(results["scores"]) /
-            len(results["scores"]) if results["scores"] else 0.0
-        )
-        return results
+async def analyze_sentiment(reviews: List[str]) -> Dict[str, float]:
+    """
+    Analyze sentiment via the Hugging Face Inference API or the local
+    batched CPU engine, depending on SENTIMENT_ENGINE
+    """
+    try:
+        return aggregate_sentiment(await classify_reviews(reviews))
     
     except Exception as e:
         print(f"Error in sentiment analysis: {e}")
         return {"error": str(e)}
 
 
-# !local model
-# from transformers import AutoModelForSequenceClassification, AutoTokenizer
-# import numpy as np
-# from scipy.special import softmax
-# import torch
-
-# # Initialize model and tokenizer once (cache globally)
-# MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
-# tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-# model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
-
-# def analyze_sentiment(reviews: list[str]) -> dict:
-#     """
-#     Analyze sentiment for a batch of product reviews.
-#     Returns:
-#         {
-#             "positive": int,
-#             "negative": int,
-#             "neutral": int,
-#             "average_score": float
-#         }
-#     """
-#     results = {"positive": 0, "negative": 0, "neutral": 0, "scores": []}
-
-
-#     for text in reviews:
-#         encoded_input = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-#         with torch.no_grad():
-#             output = model(**encoded_input)
-
-#         scores = softmax(output.logits[0].numpy())
-#         predicted_label = np.argmax(scores)
-
-#         if predicted_label == 0:
-#             results["negative"] += 1
-#         elif predicted_label == 1:
-#             results["neutral"] += 1
-#         else:
-#             results["positive"] += 1
-#         results["scores"].append(float(scores[predicted_label]))
-
-#     results["average_score"] = float(np.mean(results["scores"])) if results["scores"] else 0.0
-#     return results
+def sentiment_stats() -> Dict[str, object]:
+    return {
+        "engine": SENTIMENT_ENGINE,
+        "batcher": get_sentiment_batcher().stats() if SENTIMENT_ENGINE != "api" else None,
+        "cache": get_sentiment_cache().stats(),
+    }
@@ -1,5 +1,7 @@
-from huggingface_hub import InferenceClient
+from huggingface_hub import AsyncInferenceClient
 from typing import List, Dict, Union
+from functools import lru_cache
+from util.executor import get_inference_limiter
 import logging
 import os
 
@@ -7,7 +9,14 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def summarize_reviews(reviews: List[str]) -> Dict[str, Union[str, int]]:
+@lru_cache(maxsize=1)
+def get_summary_client() -> AsyncInferenceClient:
+    # return AsyncInferenceClient(model="mistralai/Mistral-7B-Instruct-v0.3", token=os.getenv("HF_TOKEN"))
+    # return AsyncInferenceClient(model="meta-llama/Llama-3.1-8B-Instruct",token=os.getenv("HF_TOKEN"))
+    return AsyncInferenceClient(model="HuggingFaceH4/zephyr-7b-beta", token=os.getenv("HF_TOKEN"))
+
+
+async def summarize_reviews(reviews: List[str]) -> Dict[str, Union[str, int]]:
     """
     Summarizes product reviews using Mistral-7B model via HuggingFace Inference API
     
@@ -21,9 +30,7 @@ def summarize_reviews(reviews: List[str]) -> Dict[str, Union[str, int]]:
         - review_count: Number of reviews processed
         OR error message if failed
     """
-    # client = InferenceClient(model="mistralai/Mistral-7B-Instruct-v0.3", token=os.getenv("HF_TOKEN"))
-    # client = InferenceClient(model="meta-llama/Llama-3.1-8B-Instruct",token=os.getenv("HF_TOKEN"))
-    client = InferenceClient(model="HuggingFaceH4/zephyr-7b-beta",token=os.getenv("HF_TOKEN"))
+    client = get_summary_client()
     logger.info(f"Received {len(reviews)} reviews to summarize")
     
     # Input validation
@@ -48,14 +55,15 @@ def summarize_reviews(reviews: List[str]) -> Dict[str, Union[str, int]]:
         {reviews_text}
         
         Summary: [/INST]"""
-        output = client.text_generation(
-            prompt=prompt,
-            max_new_tokens=250,  
-            temperature=0.5,    
-            top_p=0.9,
-            do_sample=True,
-            stop=["</s>"]
-        )
+        async with get_inference_limiter():
+            output = await client.text_generation(
+                prompt=prompt,
+                max_new_tokens=250,  
+                temperature=0.5,    
+                top_p=0.9,
+                do_sample=True,
+                stop=["</s>"]
+            )
         
         summary = output.split("Summary:")[-1].strip()
         summary = summary.replace('"', "'") 
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+from typing import List
+from schemas.user import ProductDetails, ReviewSummary, SentimentSummary
+
+
+class ReviewSentiment(BaseModel):
+    """Sentiment prediction for one review, keyed by its content hash"""
+    hash: str
+    label: str
+    score: float
+
+
+class ProductAnalysis(BaseModel):
+    """
+    Shared, user-independent analysis of a single product. Its chunk
+    vectors live separately in the product_vectors collection.
+    """
+    product_id: str
+    url: str
+    product_details: ProductDetails
+    review_summary: ReviewSummary
+    sentiment_summary: SentimentSummary
+    # Per-review predictions, in review order, for incremental re-analysis
+    review_sentiments: List[ReviewSentiment] = Field(default_factory=list)
+    analyzed_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc))
@@ -1,11 +1,11 @@
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
-from werkzeug.security import generate_password_hash
 
 class Document(BaseModel):
     doc_text: str
     vectors: List[float]
+    source: Optional[str] = None
 
 
 class InfoDocument(BaseModel):
@@ -39,24 +39,16 @@ class SentimentSummary(BaseModel):
 
 
 class RecentSearch(BaseModel):
+    """Lightweight reference to a shared product analysis"""
     product_id: str
     url: str
-    product_details: ProductDetails
-    review_summary: ReviewSummary
-    sentiment_summary: SentimentSummary
-    info_docs: List[Document] = Field(default_factory=list)
+    name: str
+    image: str
     created_at: datetime = Field(default_factory=datetime.now)
 
 
 class User(BaseModel):
+    """Stored user; `password` is the hash from util.passwords.hash_password"""
     username: str
     password: str
-    recentSearches: Optional[List[dict]] = Field(default_factory=list) 
-
-    # Auto-hash password
-    @field_validator("password")
-    def hash_password(cls, v: str) -> str:
-        """Automatically hash passwords before saving."""
-        return generate_password_hash(v)
-    
-    
+    recentSearches: Optional[List[dict]] = Field(default_factory=list)
@@ -0,0 +1,142 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+import httpx
+from selectolax.lexbor import LexborHTMLParser as HTMLParser, LexborNode as Node
+from scrapers.amazon_scraper import SELECTORS, merge_reviews, review_page_url, review_pairs
+
+# Elements the browser's innerText separates with line breaks
+BREAK_TAGS = {
+    "br", "p", "div", "li", "ul", "ol", "tr", "td", "th", "table",
+    "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "header", "footer",
+}
+SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+
+
+def _collect_text(node: Node, parts: List[str]):
+    for child in node.iter(include_text=True):
+        if child.tag == "-text":
+            parts.append(child.text(deep=False))
+        elif child.tag.startswith("-") or child.tag in SKIPPED_TAGS:
+            continue
+        elif child.tag in BREAK_TAGS:
+            parts.append(" ")
+            _collect_text(child, parts)
+            parts.append(" ")
+        else:
+            _collect_text(child, parts)
+
+
+def _text(node: Optional[Node]) -> Optional[str]:
+    """
+    Text of `node` normalised like EXTRACT_SCRIPT's innerText: inline
+    markup joins ("39<span>.</span>" is "39."), line breaks and block
+    boundaries become spaces, and whitespace runs collapse to one space.
+    """
+    if node is None:
+        return None
+    parts: List[str] = []
+    _collect_text(node, parts)
+    return " ".join("".join(parts).split())
+
+
+def _first(tree: HTMLParser, selectors: List[str]) -> Optional[str]:
+    for selector in selectors:
+        value = _text(tree.css_first(selector))
+        if value:
+            return value
+    return None
+
+
+def _first_attr(tree: HTMLParser, selectors: List[str], attr: str) -> Optional[str]:
+    for selector in selectors:
+        node = tree.css_first(selector)
+        value = node.attributes.get(attr) if node is not None else None
+        if value:
+            return value
+    return None
+
+
+def _first_all(tree: HTMLParser, selectors: List[str]) -> List[Node]:
+    for selector in selectors:
+        nodes = tree.css(selector)
+        if nodes:
+            return nodes
+    return []
+
+
+def parse_product_html(html: str) -> Dict[str, Any]:
+    """
+    Parse a server-rendered Amazon page with the same selectors and
+    payload shape as the in-browser extraction script.
+    """
+    tree = HTMLParser(html)
+
+    overview = []
+    for row in _first_all(tree, SELECTORS["overview"]):
+        cells = row.css("td")
+        if len(cells) != 2:
+            continue
+        key = (_text(cells[0]) or "").rstrip(":")
+        value = _text(cells[1])
+        if key and value:
+            overview.append(f"{key}: {value}")
+
+    reviews = []
+    for review in tree.css(SELECTORS["review"]):
+        body = _text(review.css_first(SELECTORS["review_body"]))
+        if body:
+            reviews.append({"id": review.attributes.get("id"), "body": body})
+
+    return {
+        "details": {
+            "name": _first(tree, SELECTORS["name"]),
+            "price": _first(tree, SELECTORS["price"]),
+            "rating": _first(tree, SELECTORS["rating"]),
+            "image": _first_attr(tree, SELECTORS["image"], "src"),
+        },
+        "about": [text for text in (_text(item) for item in _first_all(tree, SELECTORS["about"])) if text],
+        "overview": overview,
+        "reviews": reviews,
+    }
+
+
+class AmazonHttpScraper:
+    """
+    Browserless tier: fetches the product page and its review pages over
+    plain HTTP and parses them without rendering. Returns None when the
+    page lacks a title or reviews (bot wall, client-side rendering), so
+    the caller can fall back to the browser.
+    """
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.review_pages = int(os.getenv("AMAZON_REVIEW_PAGES", 3))
+        self.max_reviews = int(os.getenv("AMAZON_MAX_REVIEWS", 50))
+
+    async def _fetch(self, url: str) -> str:
+        response = await self.client.get(url)
+        response.raise_for_status()
+        return response.text
+
+    async def _fetch_reviews(self, url: str):
+        return review_pairs(parse_product_html(await self._fetch(url))["reviews"])
+
+    async def scrape(self, url: str) -> Optional[Dict[str, Any]]:
+        html = await self._fetch(url)
+        landing = parse_product_html(html)
+        if not landing["details"]["name"] or not landing["reviews"]:
+            return None
+
+        urls = [review_page_url(url, n) for n in range(1, self.review_pages + 1)]
+        pages = await asyncio.gather(
+            *(self._fetch_reviews(page_url) for page_url in urls if page_url),
+            return_exceptions=True
+        )
+
+        return {
+            "product_details": landing["details"],
+            "about": landing["about"],
+            "reviews": merge_reviews([review_pairs(landing["reviews"]), *pages], self.max_reviews),
+            "html": html,
+        }
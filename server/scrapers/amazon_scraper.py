@@ -1,56 +1,166 @@
-from typing import Dict, List, Optional
-from playwright.async_api import Page, TimeoutError
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fallback selectors, tried in order. Shared by the in-page extraction
+# script so every field is read in a single round trip.
+SELECTORS = {
+    "name": ["#productTitle", "#title"],
+    "price": [
+        ".a-price-whole",
+        ".priceToPay span.a-price-whole",
+        "#priceblock_ourprice",
+        "#priceblock_dealprice"
+    ],
+    "rating": ["i.a-icon-star span.a-icon-alt"],
+    "image": ["#landingImage", "#imgBlkFront", "#main-image"],
+    "about": [
+        "#feature-bullets .a-unordered-list .a-list-item",
+        "#feature-bullets ul.a-vertical .a-list-item"
+    ],
+    "overview": [
+        "#productOverview_feature_div table.a-normal tr",
+        "table#productDetails_detailBullets_sections1 tr"
+    ],
+    "review": "li[data-hook='review']",
+    "review_body": "span[data-hook='review-body']",
+}
+
+EXTRACT_SCRIPT = """
+(selectors) => {
+    // Collapse whitespace (including innerText's line breaks) to single
+    // spaces, matching the HTTP tier's normalisation
+    const clean = (value) => value.replace(/\\s+/g, " ").trim();
+    const text = (el) => el ? clean(el.innerText) : null;
+    const first = (list) => {
+        for (const selector of list) {
+            const value = text(document.querySelector(selector));
+            if (value) return value;
+        }
+        return null;
+    };
+    const firstAttr = (list, attr) => {
+        for (const selector of list) {
+            const el = document.querySelector(selector);
+            const value = el && el.getAttribute(attr);
+            if (value) return value;
+        }
+        return null;
+    };
+    const firstAll = (list) => {
+        for (const selector of list) {
+            const items = Array.from(document.querySelectorAll(selector));
+            if (items.length) return items;
+        }
+        return [];
+    };
+
+    const overview = [];
+    for (const row of firstAll(selectors.overview)) {
+        const cells = row.querySelectorAll("td");
+        if (cells.length !== 2) continue;
+        const key = text(cells[0]).replace(/:$/, "");
+        const value = text(cells[1]);
+        if (key && value) overview.push(`${key}: ${value}`);
+    }
+
+    return {
+        details: {
+            name: first(selectors.name),
+            price: first(selectors.price),
+            rating: first(selectors.rating),
+            image: firstAttr(selectors.image, "src"),
+        },
+        about: firstAll(selectors.about).map(text).filter((t) => t),
+        overview: overview,
+        reviews: Array.from(document.querySelectorAll(selectors.review)).map((review) => ({
+            id: review.id || null,
+            body: text(review.querySelector(selectors.review_body)),
+        })).filter((review) => review.body),
+    };
+}
+"""
+
+
+def review_page_url(product_url: str, page_number: int) -> Optional[str]:
+    """URL of the given all-reviews page for an Amazon product URL"""
+    match = re.search(r"/dp/([A-Z0-9]{10})", product_url)
+    if not match:
+        return None
+    parts = urlsplit(product_url)
+    return (f"{parts.scheme}://{parts.netloc}/product-reviews/{match.group(1)}/"
+            f"?reviewerType=all_reviews&pageNumber={page_number}")
+
+
+def review_pairs(reviews: List[Dict[str, Optional[str]]]) -> List[Tuple[str, str]]:
+    """(review id, review body) pairs, hashing the body when the ID is missing"""
+    return [
+        (review["id"] or hashlib.sha1(review["body"].encode("utf-8")).hexdigest(), review["body"])
+        for review in reviews
+    ]
+
+
+def merge_reviews(pages: List[Any], max_reviews: int) -> List[str]:
+    """
+    Review bodies from several pages of (id, body) pairs, deduplicated by
+    ID and capped at `max_reviews`. Pages that failed (exceptions) are skipped.
+    """
+    seen = set()
+    reviews = []
+    for page_reviews in pages:
+        if isinstance(page_reviews, BaseException):
+            logger.warning(f"Error fetching review page: {page_reviews!r}")
+            continue
+        for review_id, body in page_reviews:
+            if review_id not in seen:
+                seen.add(review_id)
+                reviews.append(body)
+    return reviews[:max_reviews]
 
 
 class AmazonScraper:
-    def __init__(self, page: Page):
+    def __init__(self, page: "Page"):
         self.page = page
         self.timeout = 10000
+        self.review_pages = int(os.getenv("AMAZON_REVIEW_PAGES", 3))
+        self.max_reviews = int(os.getenv("AMAZON_MAX_REVIEWS", 50))
+        self.review_page_timeout = int(os.getenv("AMAZON_REVIEW_PAGE_TIMEOUT_MS", 15000))
+        self._extracted: Optional[Dict[str, Any]] = None
 
-    async def _safe_query(self, selector: str, attribute: str = None) -> Optional[str]:
-        """Safe element query with error handling"""
+    async def _extract(self, page: "Page", wait_for: str, timeout: int) -> Dict[str, Any]:
+        """Run the extraction script once, after waiting for `wait_for` to render"""
         try:
-            element = await self.page.query_selector(selector)
-            if not element:
-                return None
-            if attribute:
-                return await element.get_attribute(attribute)
-            return (await element.inner_text()).strip()
+            await page.wait_for_selector(wait_for, timeout=timeout)
         except Exception:
-            return None
+            pass
+        return await page.evaluate(EXTRACT_SCRIPT, SELECTORS)
+
+    async def extract(self) -> Dict[str, Any]:
+        """
+        Product details, about bullets, overview rows and reviews read from
+        the landing page in one `page.evaluate` call. The result is reused
+        by the per-field methods below.
+        """
+        if self._extracted is None:
+            self._extracted = await self._extract(
+                self.page, f"#feature-bullets, {SELECTORS['review']}", self.timeout)
+        return self._extracted
 
     async def get_product_details(self) -> Dict[str, Optional[str]]:
         """Get basic product details with multiple fallback selectors"""
         try:
-            product_name = await self._safe_query("#productTitle") or await self._safe_query("#title")
-
-            price_selectors = [
-                ".a-price-whole",
-                ".priceToPay span.a-price-whole",
-                "#priceblock_ourprice",
-                "#priceblock_dealprice"
-            ]
-
-            product_price = None
-            for selector in price_selectors:
-                price = await self._safe_query(selector)
-                if price:
-                    product_price = price
-                    break
-
-            rating_element = await self.page.query_selector("i.a-icon-star span.a-icon-alt")
-            product_rating = (await rating_element.inner_text()).strip() if rating_element else None
-
-            image_url = (await self._safe_query("#landingImage", "src") or
-                         await self._safe_query("#imgBlkFront", "src") or
-                         await self._safe_query("#main-image", "src"))
-
-            return {
-                "name": product_name,
-                "price": product_price,
-                "rating": product_rating,
-                "image": image_url,
-            }
+            return (await self.extract())["details"]
         except Exception as e:
             print(f"Error getting product details: {e}")
             return {}
@@ -58,66 +168,68 @@ class AmazonScraper:
     async def get_product_about(self) -> List[str]:
         """Get product about section with more robust selectors"""
         try:
-            await self.page.wait_for_selector("#feature-bullets", timeout=self.timeout)
-
-            feature_items = (await self.page.query_selector_all('#feature-bullets .a-unordered-list .a-list-item') or
-                             await self.page.query_selector_all('#feature-bullets ul.a-vertical .a-list-item'))
-
-            return [await item.inner_text() for item in feature_items if await item.inner_text()]
-
+            return (await self.extract())["about"]
         except Exception as e:
             print(f"Error getting product about: {e}")
             return []
 
     async def get_product_overview_features(self) -> List[str]:
         """Get product overview features with table parsing"""
-        highlights = []
         try:
-            try:
-                await self.page.wait_for_selector(
-                    "#productOverview_feature_div table.a-normal",
-                    timeout=5000
-                )
-                rows = await self.page.query_selector_all(
-                    "#productOverview_feature_div table.a-normal tr"
-                )
-            except TimeoutError:
-                await self.page.wait_for_selector(
-                    "table#productDetails_detailBullets_sections1",
-                    timeout=5000
-                )
-                rows = await self.page.query_selector_all(
-                    "table#productDetails_detailBullets_sections1 tr"
-                )
-
-            for row in rows:
-                cells = await row.query_selector_all("td")
-                if len(cells) == 2:
-                    key = (await cells[0].inner_text()).strip().rstrip(":")
-                    value = (await cells[1].inner_text()).strip()
-                    if key and value:
-                        highlights.append(f"{key}: {value}")
-
+            return (await self.extract())["overview"]
         except Exception as e:
             print(f"Error while scraping product highlights: {e}")
-
-        return highlights
+            return []
 
     async def get_product_reviews(self) -> List[str]:
         """Get product reviews (without pagination)"""
         try:
-            reviews = []
-            await self.page.wait_for_selector("li[data-hook='review']")
-            reviews_on_page = self.page.locator("li[data-hook='review']")
-            count = await reviews_on_page.count()
-
-            for i in range(count):
-                review = reviews_on_page.nth(i)
-                review_body = await review.locator("span[data-hook='review-body']").inner_text()
-                reviews.append(review_body)
-
+            return [review["body"] for review in (await self.extract())["reviews"]]
         except Exception as e:
             print(f"Error occurred: {e}")
             return []
 
-        return reviews
+    async def _fetch_review_page(self, url: str) -> List[Tuple[str, str]]:
+        """Load one review page in its own tab of the current context"""
+        page = await self.page.context.new_page()
+        try:
+            await page.goto(url, timeout=self.review_page_timeout, wait_until="domcontentloaded")
+            extracted = await self._extract(page, SELECTORS["review"], self.review_page_timeout)
+            return review_pairs(extracted["reviews"])
+        finally:
+            await page.close()
+
+    async def get_all_reviews(self) -> List[str]:
+        """
+        Landing-page reviews plus up to `review_pages` review pages fetched
+        concurrently, deduplicated by review ID and capped at `max_reviews`.
+        Pages that fail or time out are skipped.
+        """
+        try:
+            landing = review_pairs((await self.extract())["reviews"])
+        except Exception as e:
+            logger.warning(f"Error reading landing-page reviews: {e}")
+            landing = []
+
+        urls = [review_page_url(self.page.url, n) for n in range(1, self.review_pages + 1)]
+        urls = [url for url in urls if url]
+        pages = await asyncio.gather(
+            *(asyncio.wait_for(self._fetch_review_page(url), self.review_page_timeout / 1000 * 2)
+              for url in urls),
+            return_exceptions=True
+        )
+
+        return merge_reviews([landing, *pages], self.max_reviews)
+
+    async def scrape(self) -> Dict[str, Any]:
+        """Product details, about bullets and reviews in the shared scrape shape"""
+        product_details = await self.get_product_details()
+        # overview = await self.get_product_overview_features()
+        about = await self.get_product_about()
+        reviews = await self.get_all_reviews()
+        return {
+            "product_details": product_details,
+            # "overview": overview,
+            "about": about,
+            "reviews": reviews,
+        }
@@ -0,0 +1,49 @@
+import re
+from typing import NamedTuple, Optional, Pattern, Tuple
+from urllib.parse import urlsplit
+from scrapers.amazon_http_scraper import AmazonHttpScraper
+from scrapers.amazon_scraper import AmazonScraper
+from scrapers.flipkart_scraper import FlipkartScraper
+
+
+class SiteScraper(NamedTuple):
+    """How to scrape and identify products on one retail site"""
+    browser_scraper: type
+    product_id_patterns: Tuple[Pattern, ...]
+    # Optional browserless tier, tried before the browser
+    http_scraper: Optional[type] = None
+
+
+# Keyed by the site's domain label, so every regional domain
+# (amazon.in, amazon.co.uk, dl.flipkart.com, ...) resolves to it
+SCRAPERS = {
+    "amazon": SiteScraper(
+        AmazonScraper,
+        (re.compile(r"/dp/([A-Z0-9]{10})"),),
+        AmazonHttpScraper
+    ),
+    "flipkart": SiteScraper(
+        FlipkartScraper,
+        (re.compile(r"[?&]pid=([A-Z0-9]{16})"), re.compile(r"/p/(itm[0-9a-z]+)")),
+    ),
+}
+
+
+def scraper_for(url: str) -> Optional[SiteScraper]:
+    host = (urlsplit(url).hostname or "").lower()
+    for label in host.split("."):
+        if label in SCRAPERS:
+            return SCRAPERS[label]
+    return None
+
+
+def product_id_from_url(url: str) -> Optional[str]:
+    """The site's product ID (Amazon ASIN, Flipkart pid) or None if unsupported"""
+    site = scraper_for(url)
+    if site is None:
+        return None
+    for pattern in site.product_id_patterns:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
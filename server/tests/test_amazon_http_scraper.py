@@ -0,0 +1,88 @@
+import asyncio
+import os
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("selectolax")
+
+from scrapers.amazon_http_scraper import AmazonHttpScraper, parse_product_html
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scrapers", "fixtures")
+PRODUCT_URL = "https://www.amazon.com/dp/B0EXAMPLE1"
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeClient:
+    def __init__(self, product_page, reviews_page):
+        self.pages = {"product": product_page, "reviews": reviews_page}
+
+    async def get(self, url):
+        return FakeResponse(self.pages["reviews" if "/product-reviews/" in url else "product"])
+
+
+def test_parse_product_page():
+    parsed = parse_product_html(_fixture("amazon_product.html"))
+
+    assert parsed["details"] == {
+        "name": "Acme Wireless Earbuds, Bluetooth 5.3 with Charging Case",
+        "price": "39.",
+        "rating": "4.4 out of 5 stars",
+        "image": "https://m.media-amazon.com/images/I/61exampleL._AC_SX679_.jpg",
+    }
+    assert parsed["about"][0] == "Up to 30 hours of playback with the charging case."
+    assert parsed["overview"] == [
+        "Brand: Acme", "Connectivity Technology: Wireless", "Colour: Black"]
+    assert [review["id"] for review in parsed["reviews"]] == [
+        "R1EXAMPLEAAAAA", "R2EXAMPLEBBBBB", "R3EXAMPLECCCCC"]
+
+
+def test_parse_reviews_page():
+    parsed = parse_product_html(_fixture("amazon_reviews_page.html"))
+
+    assert parsed["details"]["name"] is None
+    assert [review["id"] for review in parsed["reviews"]] == [
+        "R2EXAMPLEBBBBB", "R4EXAMPLEDDDDD", "R5EXAMPLEEEEEE"]
+    assert parsed["reviews"][1]["body"] == (
+        "Noise isolation is fine on the train, but calls sound muffled.")
+
+
+def test_line_breaks_in_review_bodies_become_spaces():
+    parsed = parse_product_html(_fixture("amazon_reviews_page.html"))
+
+    # The browser tier reads "Arrived quickly.\nPaired ..." and collapses it the same way
+    assert parsed["reviews"][2]["body"] == (
+        "Arrived quickly. Paired with my phone in seconds. Would buy again.")
+
+
+def test_scrape_merges_and_dedupes_review_pages():
+    client = FakeClient(_fixture("amazon_product.html"), _fixture("amazon_reviews_page.html"))
+
+    result = asyncio.run(AmazonHttpScraper(client).scrape(PRODUCT_URL))
+
+    assert result["product_details"]["name"].startswith("Acme Wireless Earbuds")
+    assert result["reviews"] == [
+        "Great sound for the price and the battery lasts all week.",
+        "The left bud disconnects every few minutes.",
+        "Comfortable fit, decent bass, case feels a little cheap.",
+        "Noise isolation is fine on the train, but calls sound muffled.",
+        "Arrived quickly. Paired with my phone in seconds. Would buy again.",
+    ]
+
+
+def test_captcha_page_falls_back_to_browser():
+    captcha = _fixture("amazon_captcha.html")
+    client = FakeClient(captcha, captcha)
+
+    assert asyncio.run(AmazonHttpScraper(client).scrape(PRODUCT_URL)) is None
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+
+for module in ("fastapi", "huggingface_hub", "numpy"):
+    pytest.importorskip(module)
+
+from models import query_handler
+from models.query_handler import PreparedQuery, stream_query_answer
+
+PREPARED = PreparedQuery("p1", 1, [0.0], None, ["doc"])
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    state = {"tokens": ["It ", "is ", "loud."], "closed": False, "remembered": []}
+
+    async def fake_stream(user_query, retrieved_docs):
+        try:
+            for token in state["tokens"]:
+                yield token
+        finally:
+            state["closed"] = True
+
+    monkeypatch.setattr(query_handler, "generate_response_stream", fake_stream)
+    monkeypatch.setattr(query_handler, "_remember_answer",
+                        lambda prepared, query, answer: state["remembered"].append(answer))
+    return state
+
+
+def test_closing_the_answer_stream_closes_the_backend_stream(backend):
+    async def run():
+        tokens = stream_query_answer("is it loud?", PREPARED)
+        first = await tokens.__anext__()
+        await tokens.aclose()
+        return first
+
+    assert asyncio.run(run()) == "It "
+    assert backend["closed"]
+    assert backend["remembered"] == []
+
+
+def test_complete_answer_is_cached(backend):
+    async def run():
+        return [token async for token in stream_query_answer("is it loud?", PREPARED)]
+
+    assert "".join(asyncio.run(run())) == "It is loud."
+    assert backend["remembered"] == ["It is loud."]
+
+
+def test_empty_answer_is_not_cached(backend):
+    backend["tokens"] = []
+
+    async def run():
+        return [token async for token in stream_query_answer("is it loud?", PREPARED)]
+
+    assert asyncio.run(run()) == []
+    assert backend["remembered"] == []
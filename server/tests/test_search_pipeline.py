@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timezone
+import pytest
+
+for module in ("huggingface_hub", "pymongo", "numpy", "httpx", "selectolax", "pydantic"):
+    pytest.importorskip(module)
+
+import numpy as np
+from models.embedding_processor import EMBEDDING_MODEL_NAME
+from models.sentiment import aggregate_sentiment
+from schemas.product import ProductAnalysis
+from util import search_pipeline
+from util.search_pipeline import SearchPipeline, content_hash
+from util.vector_store import ProductVectors
+
+DETAILS = {"name": "Earbuds", "image": "img", "price": "39.", "rating": "4.4", "about": ["Loud"]}
+
+
+def _predict(review):
+    label = ("negative", "neutral", "positive")[len(review) % 3]
+    return label, round(0.5 + (len(review) % 7) / 20, 2)
+
+
+@pytest.fixture
+def classified(monkeypatch):
+    calls = []
+
+    async def fake_classify_reviews(reviews):
+        calls.append(list(reviews))
+        return [_predict(review) for review in reviews]
+
+    monkeypatch.setattr(search_pipeline, "classify_reviews", fake_classify_reviews)
+    return calls
+
+
+def _analyze(reviews, previous=None, previous_vectors=None):
+    pipeline = SearchPipeline("https://example.com", previous=previous, previous_vectors=previous_vectors)
+    pipeline.data.update({"reviews": reviews, "product_details": dict(DETAILS)})
+    asyncio.run(pipeline._analyze_sentiment())
+    return pipeline
+
+
+def _stored(pipeline):
+    return ProductAnalysis(
+        product_id="p1",
+        url="https://example.com",
+        product_details=DETAILS,
+        review_summary={"review_count": 0, "summary_text": "", "word_count": 0},
+        sentiment_summary=pipeline.data["sentiment_details"],
+        review_sentiments=pipeline.data["review_sentiments"],
+    )
+
+
+@pytest.mark.parametrize("current", [
+    ["great", "awful sound", "fine", "ok I guess", "superb"],      # added
+    ["great", "fine"],                                             # removed
+    ["great", "great", "awful sound", "fine", "fine", "fine"],     # duplicated
+    ["fine", "brand new review", "great"],                         # all at once
+])
+def test_incremental_sentiment_matches_full_retally(classified, current):
+    previous = _stored(_analyze(["great", "awful sound", "fine", "great"]))
+    incremental = _analyze(current, previous).data["sentiment_details"]
+    full = aggregate_sentiment([_predict(review) for review in current])
+
+    for key in ("positive", "negative", "neutral", "scores"):
+        assert incremental[key] == full[key]
+    assert incremental["avg_score"] == pytest.approx(full["avg_score"])
+
+
+def test_incremental_sentiment_classifies_only_new_reviews(classified):
+    previous = _stored(_analyze(["great", "fine"]))
+    classified.clear()
+
+    _analyze(["fine", "great", "brand new review", "brand new review"], previous)
+
+    assert classified == [["brand new review"]]
+
+
+def test_embedding_reuses_chunks_of_unchanged_texts(classified, monkeypatch):
+    embedded = []
+
+    async def fake_run_model(fn, texts, sources):
+        embedded.extend(texts)
+        return [{"doc_text": text, "vectors": [1.0], "source": source}
+                for text, source in zip(texts, sources)]
+
+    monkeypatch.setattr(search_pipeline, "run_model", fake_run_model)
+    previous = _stored(_analyze(["great", "fine"]))
+    previous_vectors = ProductVectors(
+        matrix=np.zeros((3, 1)),
+        texts=["great", "fine", "gone"],
+        version=datetime.now(timezone.utc),
+        model=EMBEDDING_MODEL_NAME,
+        sources=[content_hash("great"), content_hash("fine"), content_hash("gone")],
+    )
+
+    pipeline = _analyze(["great", "new"], previous, previous_vectors)
+    asyncio.run(pipeline._embed_documents())
+
+    reused = [doc["doc_text"] for doc in pipeline.data["info_docs"] if doc["vectors"] == [0.0]]
+    assert reused == ["great"]
+    assert "new" in embedded and "great" not in embedded and "fine" not in embedded
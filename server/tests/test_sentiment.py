@@ -0,0 +1,25 @@
+import asyncio
+import pytest
+
+pytest.importorskip("huggingface_hub")
+pytest.importorskip("pymongo")
+
+from models import sentiment
+
+
+def test_classify_batch_remote_keeps_review_order(monkeypatch):
+    texts = [f"review {i}" for i in range(20)]
+
+    async def fake_classify_remote(text):
+        # Later reviews finish first, so completion order is reversed
+        index = int(text.split()[1])
+        await asyncio.sleep((len(texts) - index) * 0.001)
+        return f"label {index}", index / 100
+
+    monkeypatch.setattr(sentiment, "_classify_remote", fake_classify_remote)
+    monkeypatch.setattr(sentiment, "SENTIMENT_CONCURRENCY", 4)
+
+    concurrent = asyncio.run(sentiment._classify_batch_remote(texts))
+    serial = [asyncio.run(fake_classify_remote(text)) for text in texts]
+
+    assert concurrent == serial
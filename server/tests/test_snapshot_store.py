@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+
+for module in ("pymongo", "huggingface_hub", "numpy", "httpx", "selectolax", "pydantic"):
+    pytest.importorskip(module)
+
+from schemas.product import ProductAnalysis
+from util import snapshot_store
+from util.search_pipeline import SearchPipeline, content_hash
+from util.snapshot_store import SnapshotStore
+
+URL = "https://www.amazon.com/dp/B0EXAMPLE1"
+PAGE = {
+    "product_details": {"name": "Earbuds", "image": "img", "price": "39.", "rating": "4.4"},
+    "about": ["Loud"],
+    "reviews": ["great", "fine"],
+}
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query, projection=None):
+        doc = self.docs.get(query["product_id"])
+        return {key: value for key, value in doc.items() if key != "html"} if doc else None
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs[query["product_id"]] = dict(doc)
+
+
+@pytest.fixture
+def scrapes(monkeypatch):
+    calls = []
+
+    async def fake_scrape(url, browser_pool=None, include_html=False):
+        calls.append(url)
+        return {**PAGE, "tier": "http", "success": True}, 200
+
+    monkeypatch.setattr(snapshot_store, "scrape", fake_scrape)
+    return calls
+
+
+def _age(store, hours):
+    doc = store.collection.docs["p1"]
+    doc["scraped_at"] = datetime.now(timezone.utc) - timedelta(hours=hours)
+
+
+def test_second_search_is_served_from_the_snapshot(scrapes):
+    store = SnapshotStore(FakeCollection(), fresh_hours=12, max_stale_hours=168)
+
+    async def run():
+        first, _ = await store.scrape("p1", URL)
+        second, _ = await store.scrape("p1", URL)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first["tier"] == "http"
+    assert second["tier"] == "snapshot"
+    assert second["reviews"] == PAGE["reviews"]
+    assert len(scrapes) == 1
+    assert store.stats()["fresh_hits"] == 1
+
+
+def test_stale_snapshot_is_served_and_refresh_calls_back(scrapes):
+    store = SnapshotStore(FakeCollection(), fresh_hours=12, max_stale_hours=168)
+    refreshed = []
+
+    async def on_refresh():
+        refreshed.append(store.collection.docs["p1"]["scraped_at"])
+
+    async def run():
+        await store.scrape("p1", URL)
+        _age(store, 30)
+        response, status_code = await store.scrape("p1", URL, on_refresh=on_refresh)
+        await asyncio.sleep(0.01)
+        return response, status_code
+
+    response, status_code = asyncio.run(run())
+
+    assert status_code == 200
+    assert response["tier"] == "snapshot"
+    assert response["snapshot_age_seconds"] >= 30 * 3600
+    assert len(scrapes) == 2
+    assert len(refreshed) == 1
+    assert datetime.now(timezone.utc) - refreshed[0] < timedelta(minutes=1)
+
+
+def test_reanalysis_is_served_the_stale_snapshot(scrapes):
+    store = SnapshotStore(FakeCollection(), fresh_hours=12, max_stale_hours=168)
+    previous = ProductAnalysis(
+        product_id="p1",
+        url=URL,
+        product_details=PAGE["product_details"],
+        review_summary={"review_count": 2, "summary_text": "", "word_count": 0},
+        sentiment_summary={"avg_score": 0.9, "negative": 0, "neutral": 1, "positive": 1,
+                           "scores": [0.9, 0.9]},
+        review_sentiments=[{"hash": content_hash(review), "label": "positive", "score": 0.9}
+                           for review in PAGE["reviews"]],
+    )
+
+    async def run():
+        await store.scrape("p1", URL)
+        _age(store, 30)
+        pipeline = SearchPipeline(URL, snapshot_store=store, product_id="p1", previous=previous)
+        await pipeline._scrape_data()
+        return pipeline
+
+    pipeline = asyncio.run(run())
+
+    assert pipeline.data["reviews"] == PAGE["reviews"]
+    assert pipeline.data["scraped_at"] < datetime.now(timezone.utc) - timedelta(hours=29)
+    assert store.stats()["stale_hits"] == 1
@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+
+for module in ("fastapi", "motor", "jose", "dotenv", "huggingface_hub", "numpy", "httpx", "selectolax"):
+    pytest.importorskip(module)
+
+from types import SimpleNamespace
+from fastapi import HTTPException
+import app as server
+from models.query_handler import prepare_query
+from util.user_store import UserStore
+
+
+class FakeCollection:
+    """Returns what Mongo returns for a user whose history lacks the product"""
+
+    def __init__(self):
+        self.updates = []
+
+    async def find_one(self, query, projection=None):
+        if query.get("username") != "alice":
+            return None
+        if projection and "recentSearches" in projection:
+            return {}
+        return {"username": "alice", "recentSearches": []}
+
+    async def update_one(self, query, update):
+        self.updates.append((query, update))
+        return SimpleNamespace(matched_count=1, modified_count=1)
+
+
+class NoVectors:
+    async def load(self, product_id):
+        return None
+
+
+def test_find_recent_search_distinguishes_missing_user_from_missing_product():
+    store = UserStore(FakeCollection(), 20)
+
+    assert asyncio.run(store.find_recent_search("bob", "p1")) is None
+    assert asyncio.run(store.find_recent_search("alice", "p1")) == {}
+
+
+def test_query_for_product_not_in_history_is_product_not_found():
+    store = UserStore(FakeCollection(), 20)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(prepare_query("is it loud?", "p1", store, "alice", NoVectors()))
+
+    assert error.value.status_code == 404
+    assert error.value.detail == "Product not found or has no documents"
+
+
+def test_search_for_product_not_in_history_runs_analysis(monkeypatch):
+    collection = FakeCollection()
+    fake_app = SimpleNamespace(state=SimpleNamespace(user_store=UserStore(collection, 20)))
+    analysis = SimpleNamespace(product_details=SimpleNamespace(name="Earbuds", image="img"))
+
+    async def fake_analysis(app, product_id, url, on_stage=None):
+        return analysis, {}, 200
+
+    monkeypatch.setattr(server, "_coalesced_analysis", fake_analysis)
+    response, status_code = asyncio.run(server._search_for_user(
+        fake_app, "alice", "p1", "https://www.amazon.com/dp/B0EXAMPLE1"))
+
+    assert status_code == 200
+    assert response["product_id"] == "p1"
+    assert len(collection.updates) == 1
@@ -0,0 +1,93 @@
+import os
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from util.cache import LRUCache
+
+
+class _ProductAnswers:
+    def __init__(self, version):
+        self.version = version
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.answers: List[str] = []
+        self.created: List[float] = []
+
+
+class SemanticAnswerCache:
+    """
+    Per-product cache of LLM answers looked up by query-embedding
+    similarity. Entries are tied to the version of the product's vectors,
+    expire after a TTL and are capped per product (oldest dropped first).
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        ttl_seconds: Optional[float] = None,
+        max_per_product: Optional[int] = None,
+        max_products: Optional[int] = None
+    ):
+        self.threshold = threshold if threshold is not None else float(
+            os.getenv("ANSWER_CACHE_THRESHOLD", 0.95))
+        self.ttl = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv("ANSWER_CACHE_TTL_SECONDS", 3600))
+        self.max_per_product = max_per_product if max_per_product is not None else int(
+            os.getenv("ANSWER_CACHE_MAX_PER_PRODUCT", 50))
+        self._products = LRUCache(max_entries=max_products if max_products is not None else int(
+            os.getenv("ANSWER_CACHE_MAX_PRODUCTS", 1000)))
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+
+    def _entry(self, product_id: str, version) -> Optional[_ProductAnswers]:
+        entry = self._products.get(product_id)
+        if entry is None:
+            return None
+        if entry.version != version:
+            self._products.pop(product_id)
+            return None
+
+        cutoff = time.monotonic() - self.ttl
+        keep = [i for i, created in enumerate(entry.created) if created >= cutoff]
+        if len(keep) != len(entry.created):
+            entry.vectors = entry.vectors[keep]
+            entry.answers = [entry.answers[i] for i in keep]
+            entry.created = [entry.created[i] for i in keep]
+        return entry
+
+    def lookup(self, product_id: str, version, query_embedding: List[float]) -> Optional[str]:
+        """Return a cached answer to a sufficiently similar earlier query"""
+        self.lookups += 1
+        entry = self._entry(product_id, version)
+        if entry is None or not entry.answers:
+            return None
+        similarities = entry.vectors @ np.asarray(query_embedding, dtype=np.float32)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        self.hits += 1
+        return entry.answers[best]
+
+    def store(self, product_id: str, version, query_embedding: List[float], answer: str):
+        if self.max_per_product <= 0:
+            return
+        entry = self._entry(product_id, version)
+        if entry is None:
+            entry = _ProductAnswers(version)
+            self._products.put(product_id, entry)
+
+        vector = np.asarray(query_embedding, dtype=np.float32)[None, :]
+        entry.vectors = vector if not entry.answers else np.vstack(
+            [entry.vectors, vector])[-self.max_per_product:]
+        entry.answers = (entry.answers + [answer])[-self.max_per_product:]
+        entry.created = (entry.created + [time.monotonic()])[-self.max_per_product:]
+        self.stores += 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "products": len(self._products),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "stores": self.stores,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+        }
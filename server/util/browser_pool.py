@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Playwright
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _PooledBrowser:
+    def __init__(self, browser: "Browser"):
+        self.browser = browser
+        self.pages_served = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.browser.is_connected()
+
+
+class BrowserPool:
+    """
+    Keeps a fixed number of warm headless Firefox instances and hands out
+    an isolated context per request. A browser is recycled after it has
+    served `max_pages` contexts or when it has disconnected (crashed).
+    """
+
+    def __init__(self, size: Optional[int] = None, max_pages: Optional[int] = None):
+        self.size = size if size is not None else int(
+            os.getenv("BROWSER_POOL_SIZE", 2))
+        self.max_pages = max_pages if max_pages is not None else int(
+            os.getenv("BROWSER_MAX_PAGES", 50))
+        self._playwright: Optional["Playwright"] = None
+        self._idle: "asyncio.Queue[_PooledBrowser]" = asyncio.Queue()
+        self._background: set = set()
+        self._closed = False
+        self._in_use = 0
+        self._waiting = 0
+        self._acquisitions = 0
+        self._recycled = 0
+        self._crashed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def start(self):
+        """Start Playwright and launch the warm browsers"""
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        browsers = await asyncio.gather(*(self._launch() for _ in range(self.size)))
+        for pooled in browsers:
+            self._idle.put_nowait(pooled)
+        logger.info(f"Browser pool started with {self.size} Firefox instances")
+
+    async def close(self):
+        """Close every browser and stop Playwright"""
+        self._closed = True
+        for task in list(self._background):
+            task.cancel()
+        while not self._idle.empty():
+            await self._close_browser(self._idle.get_nowait())
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self) -> _PooledBrowser:
+        browser = await self._playwright.firefox.launch(headless=True)
+        return _PooledBrowser(browser)
+
+    async def _close_browser(self, pooled: _PooledBrowser):
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled browser: {e}")
+
+    async def _recycle(self, pooled: _PooledBrowser):
+        """Replace a worn-out or crashed browser, retrying until it launches"""
+        await self._close_browser(pooled)
+        delay = 1.0
+        while not self._closed:
+            try:
+                self._idle.put_nowait(await self._launch())
+                self._recycled += 1
+                return
+            except Exception as e:
+                logger.error(f"Failed to relaunch pooled browser: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def _track(self, task: asyncio.Task):
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _recycle_in_background(self, pooled: _PooledBrowser):
+        self._track(asyncio.create_task(self._recycle(pooled)))
+
+    def _release(self, pooled: _PooledBrowser):
+        if self._closed:
+            self._track(asyncio.create_task(self._close_browser(pooled)))
+        elif not pooled.healthy:
+            self._crashed += 1
+            self._recycle_in_background(pooled)
+        elif pooled.pages_served >= self.max_pages:
+            self._recycle_in_background(pooled)
+        else:
+            self._idle.put_nowait(pooled)
+
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator["BrowserContext"]:
+        """Borrow a browser and yield a fresh context that is closed on exit"""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+
+        started = time.perf_counter()
+        self._waiting += 1
+        try:
+            pooled = await self._idle.get()
+            # A browser can crash while idle; replace it and take the next one
+            while not pooled.healthy:
+                self._crashed += 1
+                self._recycle_in_background(pooled)
+                pooled = await self._idle.get()
+        finally:
+            self._waiting -= 1
+        waited = time.perf_counter() - started
+        self._acquisitions += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+        self._in_use += 1
+        context = None
+        try:
+            context = await pooled.browser.new_context()
+            yield context
+        finally:
+            pooled.pages_served += 1
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            self._in_use -= 1
+            self._release(pooled)
+
+    def stats(self) -> Dict[str, object]:
+        """Pool size, utilisation and wait-time statistics"""
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "in_use": self._in_use,
+            "waiting": self._waiting,
+            "acquisitions": self._acquisitions,
+            "recycled": self._recycled,
+            "crashed": self._crashed,
+            "avg_wait_ms": round(1000 * self._total_wait / self._acquisitions, 2)
+            if self._acquisitions else 0.0,
+            "max_wait_ms": round(1000 * self._max_wait, 2),
+        }
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict
+
+
+class MeteredThreadPool:
+    """
+    Thread pool for blocking model work (tokenization, torch inference).
+    Torch releases the GIL inside its kernels, so threads share one copy of
+    each loaded model instead of reloading it per process.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+
+    def _call(self, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._queued += 1
+        return await loop.run_in_executor(
+            self._pool, self._call, partial(fn, *args, **kwargs))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+            }
+
+
+class ConcurrencyLimiter:
+    """Async semaphore around remote inference calls that tracks its queue"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+        self._waiting = 0
+        self._active = 0
+        self._completed = 0
+
+    async def __aenter__(self):
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._active += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self._active -= 1
+        self._completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "limit": self.limit,
+            "queued": self._waiting,
+            "active": self._active,
+            "completed": self._completed,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_model_pool() -> MeteredThreadPool:
+    return MeteredThreadPool(
+        "model",
+        int(os.getenv("MODEL_POOL_WORKERS", min(4, os.cpu_count() or 1)))
+    )
+
+
+@lru_cache(maxsize=1)
+def get_password_pool() -> MeteredThreadPool:
+    """
+    Bounded pool for password hashing and verification. hashlib's PBKDF2
+    and scrypt release the GIL, so threads hash in parallel while the
+    event loop keeps serving other requests.
+    """
+    return MeteredThreadPool(
+        "password",
+        int(os.getenv("PASSWORD_POOL_WORKERS", min(4, os.cpu_count() or 1)))
+    )
+
+
+@lru_cache(maxsize=1)
+def get_inference_limiter() -> ConcurrencyLimiter:
+    return ConcurrencyLimiter(int(os.getenv("INFERENCE_MAX_CONCURRENCY", 8)))
+
+
+async def run_model(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run blocking, CPU-bound model work off the event loop"""
+    return await get_model_pool().run(fn, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict[str, int]]:
+    return {
+        "model_pool": get_model_pool().stats(),
+        "password_pool": get_password_pool().stats(),
+        "inference": get_inference_limiter().stats(),
+    }
+
+
+def shutdown_executors():
+    if get_model_pool.cache_info().currsize:
+        get_model_pool().shutdown()
+    if get_password_pool.cache_info().currsize:
+        get_password_pool().shutdown()
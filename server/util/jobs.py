@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+from util.search_pipeline import StageCallback
+from util.sse import format_sse
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+JobRunner = Callable[[Dict[str, Any], StageCallback], Awaitable[Tuple[Dict[str, Any], int]]]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class SearchJobManager:
+    """
+    Runs search jobs on a bounded set of background workers.
+
+    Jobs are persisted in Mongo so their state can be polled from any
+    worker process. The owning process heartbeats its queued and running
+    jobs; on startup, jobs whose heartbeat has gone stale (their worker
+    died) are claimed and run again.
+    """
+
+    def __init__(self, collection, runner: JobRunner, workers: Optional[int] = None):
+        self.collection = collection
+        self.runner = runner
+        self.workers = workers if workers is not None else int(
+            os.getenv("SEARCH_JOB_WORKERS", 2))
+        self.heartbeat_interval = float(
+            os.getenv("SEARCH_JOB_HEARTBEAT_SECONDS", 10))
+        self.stale_after = timedelta(
+            seconds=float(os.getenv("SEARCH_JOB_STALE_SECONDS", 60)))
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._owned: Set[str] = set()
+        self._running = 0
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._tasks = []
+
+    async def start(self):
+        await self.collection.create_index("job_id", unique=True)
+        await self.collection.create_index([("status", 1), ("heartbeat_at", 1)])
+        resumed = await self._resume_stale_jobs()
+        if resumed:
+            logger.info(f"Resumed {resumed} interrupted search jobs")
+        self._tasks = [asyncio.create_task(self._worker())
+                       for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _resume_stale_jobs(self) -> int:
+        resumed = 0
+        while True:
+            job = await self.collection.find_one_and_update(
+                {
+                    "status": {"$in": ["queued", "running"]},
+                    "heartbeat_at": {"$lt": _now() - self.stale_after},
+                },
+                {"$set": {"status": "queued", "owner": self.owner, "heartbeat_at": _now()}},
+                projection={"job_id": 1}
+            )
+            if not job:
+                return resumed
+            self._enqueue(job["job_id"])
+            resumed += 1
+
+    def _enqueue(self, job_id: str):
+        self._owned.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self._owned:
+                continue
+            try:
+                await self.collection.update_many(
+                    {"job_id": {"$in": list(self._owned)}},
+                    {"$set": {"heartbeat_at": _now()}}
+                )
+            except Exception as e:
+                logger.warning(f"Search job heartbeat failed: {e}")
+
+    async def submit(self, username: str, product_id: str, url: str) -> str:
+        """Persist a new job and queue it; returns the job ID immediately"""
+        now = _now()
+        job_id = uuid.uuid4().hex
+        await self.collection.insert_one({
+            "job_id": job_id,
+            "username": username,
+            "product_id": product_id,
+            "url": url,
+            "status": "queued",
+            "stages": {},
+            "result": None,
+            "error": None,
+            "owner": self.owner,
+            "created_at": now,
+            "updated_at": now,
+            "heartbeat_at": now,
+        })
+        self._enqueue(job_id)
+        return job_id
+
+    async def get(self, job_id: str, username: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one(
+            {"job_id": job_id, "username": username},
+            {"_id": 0, "owner": 0, "heartbeat_at": 0}
+        )
+
+    async def _update(self, job_id: str, fields: Dict[str, Any], event: str, payload: Dict[str, Any]):
+        fields["updated_at"] = _now()
+        try:
+            await self.collection.update_one({"job_id": job_id}, {"$set": fields})
+        except Exception as e:
+            logger.warning(f"Failed to persist search job {job_id}: {e}")
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait((event, payload))
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self._running += 1
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Search job {job_id} crashed: {e}", exc_info=True)
+            finally:
+                self._running -= 1
+                self._owned.discard(job_id)
+
+    async def _run(self, job_id: str):
+        job = await self.collection.find_one({"job_id": job_id})
+        if not job or job["status"] in TERMINAL_STATUSES:
+            return
+
+        await self._update(job_id, {"status": "running", "stages": {}},
+                           "status", {"status": "running"})
+
+        async def on_stage(stage: str, elapsed_ms: float):
+            await self._update(
+                job_id,
+                {f"stages.{stage}": {"elapsed_ms": elapsed_ms, "completed_at": _now()}},
+                "stage",
+                {"stage": stage, "elapsed_ms": elapsed_ms}
+            )
+
+        try:
+            result, status_code = await self.runner(job, on_stage)
+        except Exception as e:
+            result, status_code = {"error": str(e) or "Internal server error"}, 500
+
+        if status_code == 200:
+            await self._update(job_id, {"status": "completed", "result": result},
+                               "status", {"status": "completed", "result": result})
+        else:
+            error = result.get("error", "Search failed")
+            await self._update(job_id, {"status": "failed", "error": error, "status_code": status_code},
+                               "status", {"status": "failed", "error": error, "status_code": status_code})
+
+    async def stream(self, job_id: str, username: str, is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[str]:
+        """
+        Server-Sent Events for a job: a snapshot first, then stage and
+        status events until the job finishes. Jobs running in another
+        process are followed by re-reading the stored job.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[job_id].add(queue)
+        try:
+            job = await self.get(job_id, username)
+            if not job:
+                return
+            yield format_sse("snapshot", job)
+            last_seen = (job["status"], len(job.get("stages", {})))
+            while job["status"] not in TERMINAL_STATUSES:
+                try:
+                    event, payload = await asyncio.wait_for(queue.get(), timeout=2.0)
+                    yield format_sse(event, payload)
+                    if event == "status" and payload["status"] in TERMINAL_STATUSES:
+                        return
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+                if await is_disconnected():
+                    return
+                job = await self.get(job_id, username)
+                if not job:
+                    return
+                seen = (job["status"], len(job.get("stages", {})))
+                if seen != last_seen:
+                    last_seen = seen
+                    yield format_sse("snapshot", job)
+                else:
+                    yield ": keepalive\n\n"
+        finally:
+            self._subscribers[job_id].discard(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "running": self._running,
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+        }
@@ -1,40 +1,82 @@
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import NamedTuple, Optional
 from jose import JWTError, jwt
 from fastapi import HTTPException, Header
+from util.cache import LRUCache
+
+
+class JWTConfig(NamedTuple):
+    secret_key: str
+    algorithm: str
+    expire_minutes: int
+
+
+@lru_cache(maxsize=1)
+def get_jwt_config() -> JWTConfig:
+    """Key settings, read from the environment once (at startup)"""
+    secret_key = os.getenv("SECRET_KEY")
+    algorithm = os.getenv("ALGORITHM")
+    if not secret_key or not algorithm:
+        raise ValueError("SECRET_KEY or ALGORITHM missing in environment variables")
+    return JWTConfig(secret_key, algorithm, int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60)))
+
+
+@lru_cache(maxsize=1)
+def get_token_cache() -> LRUCache:
+    """Verified tokens mapped to (username, expiry timestamp)"""
+    return LRUCache(max_entries=int(os.getenv("TOKEN_CACHE_SIZE", 10000)))
 
 
 def create_access_token(username: str) -> str:
+    config = get_jwt_config()
     expire = datetime.now(timezone.utc) + timedelta(
-        minutes=60
+        minutes=config.expire_minutes
     )
     return jwt.encode(
         {"sub": username, "exp": expire},
-        os.getenv("SECRET_KEY"),
-        algorithm=os.getenv("ALGORITHM")
+        config.secret_key,
+        algorithm=config.algorithm
     )
 
 
 def verify_token(token: str) -> Optional[str]:
+    """
+    Return the token's subject if it is valid. Verified tokens are cached
+    until they expire, so repeat requests skip signature verification.
+    """
+    cache = get_token_cache()
+    cached = cache.get(token)
+    if cached is not None:
+        username, expires_at = cached
+        if expires_at > datetime.now(timezone.utc).timestamp():
+            return username
+        cache.pop(token)
+
+    config = get_jwt_config()
     try:
         payload = jwt.decode(
             token,
-            os.getenv("SECRET_KEY"),
-            algorithms=[os.getenv("ALGORITHM")],
+            config.secret_key,
+            algorithms=[config.algorithm],
         )
-        return payload.get("sub")
     except JWTError:
         return None
-    
+
+    username = payload.get("sub")
+    if username and payload.get("exp") is not None:
+        cache.put(token, (username, float(payload["exp"])))
+    return username
+
 
 def get_current_user(authorization: Optional[str] = Header(None)) -> str:
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing or invalid token")
-    
+
     token = authorization.split(" ")[1]
     username = verify_token(token)
-    
+
     if not username:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
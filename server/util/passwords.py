@@ -0,0 +1,11 @@
+from werkzeug.security import check_password_hash, generate_password_hash
+from util.executor import get_password_pool
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password on the password pool, off the event loop"""
+    return await get_password_pool().run(generate_password_hash, password)
+
+
+async def verify_password(password_hash: str, password: str) -> bool:
+    return await get_password_pool().run(check_password_hash, password_hash, password)
@@ -0,0 +1,50 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from schemas.product import ProductAnalysis
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ProductStore:
+    """
+    Cross-user store of product analyses keyed by product ID (ASIN).
+    An analysis is served only while it is younger than the TTL.
+    """
+
+    def __init__(self, collection, ttl_hours: Optional[float] = None):
+        self.collection = collection
+        self.ttl = timedelta(hours=ttl_hours if ttl_hours is not None else float(
+            os.getenv("PRODUCT_CACHE_TTL_HOURS", 24)))
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("product_id", unique=True)
+
+    async def get_fresh(self, product_id: str) -> Optional[ProductAnalysis]:
+        """Return the stored analysis if it is still within the TTL"""
+        if self.ttl <= timedelta(0):
+            return None
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        doc = await self.collection.find_one(
+            {"product_id": product_id, "analyzed_at": {"$gte": cutoff}},
+            {"_id": 0}
+        )
+        if not doc:
+            return None
+        logger.info(f"Serving stored analysis for product {product_id}")
+        return ProductAnalysis(**doc)
+
+    async def get(self, product_id: str) -> Optional[ProductAnalysis]:
+        """Return the stored analysis regardless of its age"""
+        doc = await self.collection.find_one({"product_id": product_id}, {"_id": 0})
+        return ProductAnalysis(**doc) if doc else None
+
+    async def save(self, analysis: ProductAnalysis):
+        await self.collection.replace_one(
+            {"product_id": analysis.product_id},
+            analysis.model_dump(),
+            upsert=True
+        )
@@ -0,0 +1,77 @@
+import os
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, List, Optional
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext, Request, Response, Route
+
+
+def _env_list(name: str, default: str) -> List[str]:
+    return [item.strip().lower() for item in os.getenv(name, default).split(",") if item.strip()]
+
+
+def _host_matches(host: str, domains: List[str]) -> bool:
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+class RequestBlocker:
+    """
+    Aborts requests the scraper never reads: heavy resource types
+    (images, fonts, stylesheets, media) and anything outside the target
+    site and its allowed asset domains (the Amazon and Flipkart CDNs).
+    Counts what was blocked and how many bytes the allowed responses
+    declared.
+
+    Aborted requests never report a size, so bytes saved cannot be
+    measured directly; compare `loaded_bytes` with blocking on and off.
+    """
+
+    def __init__(self, url: str):
+        self.enabled = os.getenv("SCRAPE_BLOCK_REQUESTS", "1") == "1"
+        self.blocked_types = set(_env_list(
+            "SCRAPE_BLOCKED_RESOURCE_TYPES", "image,font,stylesheet,media"))
+        host = (urlsplit(url).hostname or "").lower()
+        self.allowed_domains = [host.removeprefix("www.")] + _env_list(
+            "SCRAPE_ALLOWED_DOMAINS", "media-amazon.com,ssl-images-amazon.com,flixcart.com")
+        self.blocked: Counter = Counter()
+        self.allowed = 0
+        self.loaded_bytes = 0
+
+    async def attach(self, context: "BrowserContext"):
+        if not self.enabled:
+            return
+        await context.route("**/*", self._handle)
+        context.on("response", self._on_response)
+
+    def _block_reason(self, request: "Request") -> Optional[str]:
+        if request.resource_type in self.blocked_types:
+            return request.resource_type
+        host = (urlsplit(request.url).hostname or "").lower()
+        if host and not _host_matches(host, self.allowed_domains):
+            return "third_party"
+        return None
+
+    async def _handle(self, route: "Route"):
+        reason = self._block_reason(route.request)
+        if reason:
+            self.blocked[reason] += 1
+            await route.abort()
+        else:
+            self.allowed += 1
+            await route.continue_()
+
+    def _on_response(self, response: "Response"):
+        try:
+            self.loaded_bytes += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "allowed_requests": self.allowed,
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_by_reason": dict(self.blocked),
+            "loaded_bytes": self.loaded_bytes,
+        }
@@ -1,51 +1,100 @@
-from playwright.async_api import async_playwright
-from scrapers.amazon_scraper import AmazonScraper
+import logging
+import os
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, Optional
+from scrapers.registry import SiteScraper, scraper_for
+from util.browser_pool import BrowserPool
+from util.http_client import USER_AGENT, get_http_client
+from util.request_blocker import RequestBlocker
 
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext
 
-async def scrape(url):
-    response = {}
-    status_code = 500
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HTTP_TIER_ENABLED = os.getenv("SCRAPE_HTTP_TIER", "1") == "1"
+
+_tier_counts: Counter = Counter()
+
+
+async def _scrape_http(site: SiteScraper, url: str) -> Optional[dict]:
+    """Browserless fast tier; None means the browser is needed"""
+    if not HTTP_TIER_ENABLED or site.http_scraper is None:
+        return None
+    try:
+        return await site.http_scraper(get_http_client()).scrape(url)
+    except Exception as e:
+        logger.info(f"HTTP tier failed for {url}: {e}")
+        return None
+
+
+async def _scrape_page(context: "BrowserContext", site: SiteScraper, url: str, include_html: bool):
+    blocker = RequestBlocker(url)
+    await blocker.attach(context)
+    page = await context.new_page()
+    await page.set_extra_http_headers({"User-Agent": USER_AGENT})
+
+    # Fields are read from the DOM, so there is no need to wait for the
+    # full load; the scraper waits for the selectors it needs.
+    await page.goto(url, wait_until="domcontentloaded")
+
+    response = {
+        **await site.browser_scraper(page).scrape(),
+        "network": blocker.stats(),
+        "tier": "browser",
+        "success": True
+    }
+    if include_html:
+        response["html"] = await page.content()
+    logger.info(f"Scraped {url}: {response['network']}")
+    return response, 200
+
+
+async def scrape(url, browser_pool: Optional[BrowserPool] = None, include_html: bool = False):
+    """
+    Scrape a product page. Tries a plain HTTP fetch first and falls back to
+    a browser when the title or reviews are missing. The browser comes from
+    the shared pool when one is given, otherwise a one-off browser is
+    launched. The serving tier is reported under "tier". With
+    `include_html`, the page HTML is returned under "html".
+    """
+    site = scraper_for(url)
+    if site is None:
+        return {"error": "Unsupported URL", "success": False}, 400
+
+    response = await _scrape_http(site, url)
+    if response is not None:
+        _tier_counts["http"] += 1
+        html = response.pop("html", None)
+        if include_html:
+            response["html"] = html
+        return {**response, "tier": "http", "success": True}, 200
+
+    _tier_counts["browser"] += 1
     try:
+        if browser_pool is not None:
+            async with browser_pool.context() as context:
+                return await _scrape_page(context, site, url, include_html)
+
+        from playwright.async_api import async_playwright
+
         async with async_playwright() as p:
             browser = await p.firefox.launch(headless=True)
-            context = await browser.new_context()
-            page = await context.new_page()
-
-            await page.set_extra_http_headers({
-                "User-Agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/91.0.4472.124 Safari/537.36"
-                )
-            })
-
-            await page.goto(url)
-
-            if "amazon" in url:
-                amazon_scraper = AmazonScraper(page)
-                product_details = await amazon_scraper.get_product_details()
-                # overview = await amazon_scraper.get_product_overview_features()
-                about = await amazon_scraper.get_product_about()
-                reviews = await amazon_scraper.get_product_reviews()
-
-                response = {
-                    "product_details": product_details,
-                    # "overview": overview,
-                    "about": about,
-                    "reviews": reviews,
-                    "success": True
-                }
-                status_code = 200
-
-    
-
-            else:
-                response = {"error": "Unsupported URL", "success": False}
-                status_code = 400
-
-            await browser.close()
-            return response, status_code
+            try:
+                context = await browser.new_context()
+                return await _scrape_page(context, site, url, include_html)
+            finally:
+                await browser.close()
 
     except Exception as e:
         return {"error": f"Error occurred in Scraping Data: {e}"}, 500
+
+
+def scrape_stats() -> Dict[str, int]:
+    return {
+        "http_tier_enabled": HTTP_TIER_ENABLED,
+        "served_by_http": _tier_counts["http"],
+        "served_by_browser": _tier_counts["browser"],
+    }
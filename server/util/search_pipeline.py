@@ -1,59 +1,138 @@
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Tuple
+import time
+from collections import Counter
+from typing import Dict, Any, List, Tuple, Optional, Callable, Awaitable
 from util.scrape import scrape
-from models.sentiment import analyze_sentiment
+from util.browser_pool import BrowserPool
+from util.snapshot_store import SnapshotStore
+from util.vector_store import ProductVectors
+from models.sentiment import aggregate_sentiment, classify_reviews, update_sentiment_summary
 from models.summarize import summarize_reviews
-from models.embedding_processor import embed_documents
+from models.embedding_processor import embed_documents, EMBEDDING_MODEL_NAME
+from schemas.product import ProductAnalysis
+from util.executor import run_model
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+StageCallback = Callable[[str, float], Awaitable[None]]
+
+# Each stage starts as soon as all of its dependencies have completed
+STAGE_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "scraped": (),
+    "sentiment": ("scraped",),
+    "summary": ("scraped",),
+    "embedded": ("scraped",),
+}
+
+
+class _StageFailed(Exception):
+    pass
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
 class SearchPipeline:
-    def __init__(self, url: str):
+    def __init__(
+        self,
+        url: str,
+        browser_pool: Optional[BrowserPool] = None,
+        on_stage: Optional[StageCallback] = None,
+        snapshot_store: Optional[SnapshotStore] = None,
+        product_id: Optional[str] = None,
+        previous: Optional[ProductAnalysis] = None,
+        previous_vectors: Optional[ProductVectors] = None,
+        on_snapshot_refresh: Optional[Callable[[], Awaitable[None]]] = None
+    ):
         self.url = url
+        self.browser_pool = browser_pool
+        self.on_stage = on_stage
+        self.snapshot_store = snapshot_store
+        self.product_id = product_id
+        # A stored analysis (and its vectors) to diff against; only reviews
+        # and texts that are new since then are classified and embedded
+        self.previous = previous if previous and previous.review_sentiments else None
+        self.previous_vectors = previous_vectors
+        # Called when a stale snapshot served to this pipeline is refreshed
+        self.on_snapshot_refresh = on_snapshot_refresh
+        self._hashes: Optional[List[str]] = None
         self.data: Dict[str, Any] = {"url": url}
         self.errors: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
 
     async def execute(self) -> Tuple[Dict[str, Any], int]:
-        """Execute the search pipeline steps in sequence"""
+        """Execute the search pipeline stages, running independent ones concurrently"""
         try:
-            # Step 1: Scrape product data
-            await self._scrape_data()
-            if "error" in self.data:
-                return self._error_response(self.data["error"], 400)
-
-            # Step 2: Analyze sentiment
-            await self._analyze_sentiment()
-            if "error" in self.data:
-                return self._error_response(self.data["error"], 400)
-
-            # Step 3: Generate summary
-            await self._generate_summary()
-            if "error" in self.data:
-                return self._error_response(self.data["error"], 400)
-
-            await self._embed_documents()
-            if "error" in self.data:
-                return self._error_response(self.data["error"], 400)
-
+            await self._run_stages()
             return self.data, 200
 
+        except _StageFailed as e:
+            return self._error_response(str(e), 400)
         except Exception as e:
             logger.error(f"Pipeline execution failed: {str(e)}")
             return self._error_response(f"Processing error: {str(e)}", 500)
 
+    async def _run_stages(self):
+        """Run the stage DAG; the first failing stage cancels the others"""
+        steps = {
+            "scraped": self._scrape_data,
+            "sentiment": self._analyze_sentiment,
+            "summary": self._generate_summary,
+            "embedded": self._embed_documents,
+        }
+        remaining = dict(STAGE_DEPENDENCIES)
+        completed = set()
+        running: Dict[asyncio.Task, str] = {}
+        try:
+            while remaining or running:
+                for stage, deps in list(remaining.items()):
+                    if completed.issuperset(deps):
+                        del remaining[stage]
+                        task = asyncio.create_task(
+                            self._run_stage(stage, steps[stage]))
+                        running[task] = stage
+
+                finished, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    stage = running.pop(task)
+                    task.result()
+                    completed.add(stage)
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def _run_stage(self, stage: str, step: Callable[[], Awaitable[None]]):
+        started = time.perf_counter()
+        await step()
+        # Checked before yielding to the loop, so a concurrent stage cannot
+        # overwrite this stage's error message
+        if "error" in self.data:
+            raise _StageFailed(self.data["error"])
+        await self._stage_done(stage, time.perf_counter() - started)
+
     async def _scrape_data(self):
         """Scrape product data from the URL"""
         try:
-            scraping_response, scraping_status = await scrape(self.url)
+            if self.snapshot_store is not None and self.product_id:
+                scraping_response, scraping_status = await self.snapshot_store.scrape(
+                    self.product_id, self.url, self.browser_pool, self.on_snapshot_refresh)
+            else:
+                scraping_response, scraping_status = await scrape(self.url, self.browser_pool)
             if scraping_status != 200:
                 self.data["error"] = scraping_response.get(
                     "error", "Scraping failed")
                 return
 
             self.data.update({
+                "scraped_at": scraping_response.get("scraped_at"),
                 "reviews": scraping_response.get("reviews", []),
                 "product_details": {
                     **scraping_response.get("product_details", {}),
@@ -67,31 +146,73 @@ class SearchPipeline:
         except Exception as e:
             self.data["error"] = f"Scraping error: {str(e)}"
 
+    def _review_hashes(self) -> List[str]:
+        if self._hashes is None:
+            self._hashes = [content_hash(review) for review in self.data["reviews"]]
+        return self._hashes
+
+    def _review_changes(self) -> Tuple[Counter, Counter]:
+        """(removed, added) review hashes since the previous analysis, as multisets"""
+        previous = Counter(record.hash for record in self.previous.review_sentiments)
+        current = Counter(self._review_hashes())
+        return previous - current, current - previous
+
     async def _analyze_sentiment(self):
-        """Analyze sentiment of the reviews"""
+        """Analyze sentiment of the reviews, classifying only unseen ones"""
         try:
             if not self.data.get("reviews"):
                 self.data["error"] = "No reviews available for sentiment analysis"
                 return
 
-            sentiment_response = analyze_sentiment(self.data["reviews"])
-            if sentiment_response is None:
-                self.data["error"] = "Sentiment analysis failed"
-                return
+            hashes = self._review_hashes()
+            predictions = {}
+            if self.previous is not None:
+                predictions = {record.hash: (record.label, record.score)
+                               for record in self.previous.review_sentiments}
+
+            unseen = {}
+            for review_hash, review in zip(hashes, self.data["reviews"]):
+                if review_hash not in predictions:
+                    unseen.setdefault(review_hash, review)
+            if unseen:
+                classified = await classify_reviews(list(unseen.values()))
+                predictions.update(zip(unseen.keys(), classified))
+
+            current = [predictions[review_hash] for review_hash in hashes]
+            if self.previous is not None:
+                removed, added = self._review_changes()
+                logger.info(f"Incremental sentiment: {sum(added.values())} added, "
+                            f"{sum(removed.values())} removed, {len(unseen)} classified")
+                sentiment_response = update_sentiment_summary(
+                    self.previous.sentiment_summary.model_dump(),
+                    [predictions[review_hash] for review_hash in removed.elements()],
+                    [predictions[review_hash] for review_hash in added.elements()],
+                    [score for _, score in current]
+                )
+            else:
+                sentiment_response = aggregate_sentiment(current)
 
             self.data["sentiment_details"] = sentiment_response
+            self.data["review_sentiments"] = [
+                {"hash": review_hash, "label": label, "score": score}
+                for review_hash, (label, score) in zip(hashes, current)
+            ]
 
         except Exception as e:
             self.data["error"] = f"Sentiment analysis error: {str(e)}"
 
     async def _generate_summary(self):
-        """Generate summary of the reviews"""
+        """Generate summary of the reviews, reusing it when they are unchanged"""
         try:
             if not self.data.get("reviews"):
                 self.data["error"] = "No reviews available for summarization"
                 return
 
-            summary_response = summarize_reviews(self.data["reviews"])
+            if self.previous is not None and self._review_changes() == (Counter(), Counter()):
+                self.data["summary_details"] = self.previous.review_summary.model_dump()
+                return
+
+            summary_response = await summarize_reviews(self.data["reviews"])
             if summary_response is None:
                 self.data["error"] = "Summary generation failed"
                 return
@@ -101,8 +222,21 @@ class SearchPipeline:
         except Exception as e:
             self.data["error"] = f"Summary generation error: {str(e)}"
 
+    def _reusable_chunks(self, sources: set) -> List[Dict[str, Any]]:
+        """Previously embedded chunks whose source text is still present"""
+        previous = self.previous_vectors
+        if (self.previous is None or previous is None
+                or previous.model != EMBEDDING_MODEL_NAME
+                or len(previous.sources) != len(previous.texts)):
+            return []
+        return [
+            {"doc_text": text, "vectors": row.tolist(), "source": source}
+            for text, row, source in zip(previous.texts, previous.matrix, previous.sources)
+            if source in sources
+        ]
+
     async def _embed_documents(self):
-        """Embed documents using a pre-trained model"""
+        """Embed documents using a pre-trained model, skipping already embedded texts"""
         try:
             if not self.data.get("product_details") or not self.data.get("reviews"):
                 self.data["error"] = "No product details available for embedding"
@@ -117,7 +251,19 @@ class SearchPipeline:
             data.append("Image Link" + self.data["product_details"].get("image", ""))
             data.append("Price" + self.data["product_details"].get("price", ""))
             data.append("Rating" + self.data["product_details"].get("rating", ""))
-            self.data["info_docs"] = embed_documents(data)
+
+            sources = [content_hash(text) for text in data]
+            reused = self._reusable_chunks(set(sources))
+            embedded = {chunk["source"] for chunk in reused}
+            new = {source: text for source, text in zip(sources, data) if source not in embedded}
+            info_docs = []
+            if new:
+                info_docs = await run_model(
+                    embed_documents, list(new.values()), sources=list(new.keys()))
+            if self.previous is not None:
+                logger.info(f"Incremental embedding: reused {len(reused)} chunks, "
+                            f"embedded {len(new)} new texts")
+            self.data["info_docs"] = reused + info_docs
             if not self.data["info_docs"]:
                 self.data["error"] = "Embedding generation failed"
                 return
@@ -125,6 +271,12 @@ class SearchPipeline:
         except Exception as e:
             self.data["error"] = f"Embedding error: {str(e)}"
 
+    async def _stage_done(self, stage: str, elapsed: float):
+        """Record a stage timing and notify the progress callback"""
+        self.timings[stage] = round(elapsed * 1000, 2)
+        if self.on_stage is not None:
+            await self.on_stage(stage, self.timings[stage])
+
     def _error_response(self, error_msg: str, status_code: int) -> Tuple[Dict[str, Any], int]:
         """Format an error response"""
         return {"error": error_msg, "url": self.url}, status_code
@@ -12,7 +12,7 @@ async def sentiment(reviews=None):
     if not reviews:
         return {"error": "No reviews provided for Sentiment Analysis"}, 400
     try:
-        results = analyze_sentiment(reviews)
+        results = await analyze_sentiment(reviews)
         return results, 200
     except Exception as e:
         return {"error": f"Error occurred in Sentiment Analysis: {e}"}, 500
@@ -0,0 +1,83 @@
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Tuple
+from pymongo import UpdateOne
+from util.cache import LRUCache
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Prediction = Tuple[str, float]
+
+
+class SentimentCache:
+    """
+    Content-addressed cache of per-review sentiment predictions, keyed by
+    a hash of the model identity and the (truncated) review text. An
+    in-memory LRU sits in front of an optional Mongo collection.
+    """
+
+    def __init__(self, max_entries: int):
+        self.memory = LRUCache(max_entries=max_entries)
+        self.collection = None
+        self.store_hits = 0
+        self.store_misses = 0
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def attach(self, collection):
+        """Back the in-memory tier with a Mongo collection"""
+        self.collection = collection
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Prediction]:
+        found: Dict[str, Prediction] = {}
+        missing = []
+        for key in keys:
+            prediction = self.memory.get(key)
+            if prediction is None:
+                missing.append(key)
+            else:
+                found[key] = prediction
+
+        if missing and self.collection is not None:
+            try:
+                async for doc in self.collection.find({"_id": {"$in": missing}}):
+                    prediction = (doc["label"], doc["score"])
+                    found[doc["_id"]] = prediction
+                    self.memory.put(doc["_id"], prediction)
+            except Exception as e:
+                logger.warning(f"Sentiment cache lookup failed: {e}")
+            hits = sum(1 for key in missing if key in found)
+            self.store_hits += hits
+            self.store_misses += len(missing) - hits
+        return found
+
+    async def put_many(self, model: str, predictions: Dict[str, Prediction]):
+        for key, prediction in predictions.items():
+            self.memory.put(key, prediction)
+
+        if predictions and self.collection is not None:
+            now = datetime.now(timezone.utc)
+            try:
+                await self.collection.bulk_write([
+                    UpdateOne(
+                        {"_id": key},
+                        {"$setOnInsert": {"label": label, "score": score,
+                                          "model": model, "created_at": now}},
+                        upsert=True
+                    )
+                    for key, (label, score) in predictions.items()
+                ], ordered=False)
+            except Exception as e:
+                logger.warning(f"Sentiment cache write failed: {e}")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "memory": self.memory.stats(),
+            "store_hits": self.store_hits,
+            "store_misses": self.store_misses,
+        }
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[..., Awaitable[None]]
+
+
+class SingleFlight:
+    """
+    In-process request coalescing: concurrent calls with the same key share
+    one execution. The shared task is shielded, so a cancelled waiter never
+    cancels the work the other waiters depend on, and an exception raised
+    by the task is re-raised in every waiter.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every waiter has gone away
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def wait(self, key: Hashable):
+        """Wait for the in-flight execution for `key`, if any, ignoring its outcome"""
+        task = self._inflight.get(key)
+        if task is not None:
+            await asyncio.wait([task])
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._inflight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
+
+
+class FlightProgress:
+    """
+    Fans progress events of a coalesced execution out to every waiter on
+    its key. Events already emitted are replayed to waiters that join
+    late, so each one sees the full sequence.
+    """
+
+    def __init__(self):
+        self._listeners: Dict[Hashable, List[ProgressCallback]] = {}
+        self._history: Dict[Hashable, List[Tuple[Any, ...]]] = {}
+
+    async def _deliver(self, callback: ProgressCallback, event: Tuple[Any, ...]):
+        try:
+            await callback(*event)
+        except Exception as e:
+            logger.warning(f"Progress callback failed: {e}")
+
+    async def subscribe(self, key: Hashable, callback: ProgressCallback):
+        self._listeners.setdefault(key, []).append(callback)
+        for event in list(self._history.get(key, ())):
+            await self._deliver(callback, event)
+
+    def unsubscribe(self, key: Hashable, callback: ProgressCallback):
+        listeners = self._listeners.get(key, [])
+        if callback in listeners:
+            listeners.remove(callback)
+        if not listeners:
+            self._listeners.pop(key, None)
+
+    def emitter(self, key: Hashable) -> ProgressCallback:
+        """The callback to hand to the shared execution for `key`"""
+        self._history[key] = []
+
+        async def emit(*event):
+            self._history.setdefault(key, []).append(event)
+            for callback in list(self._listeners.get(key, ())):
+                await self._deliver(callback, event)
+
+        return emit
+
+    def finish(self, key: Hashable):
+        self._history.pop(key, None)
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+from bson import Binary
+from util.browser_pool import BrowserPool
+from util.scrape import scrape
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = ("product_details", "about", "reviews")
+
+
+class SnapshotStore:
+    """
+    Stores the extracted scrape payload per product ID, optionally with
+    the zlib-compressed page HTML, so scraping can be skipped.
+
+    Snapshots younger than `fresh_hours` are served as is. Older ones are
+    served while a background re-scrape refreshes them, up to
+    `max_stale_hours`; past that, the product is scraped synchronously.
+
+    An analysis outlives the fresh window (PRODUCT_CACHE_TTL_HOURS is
+    longer than SNAPSHOT_FRESH_HOURS), so a re-analysis is normally served
+    a stale snapshot. Its `on_refresh` callback runs once the background
+    re-scrape has saved, so the caller can re-analyse the new data.
+    """
+
+    def __init__(
+        self,
+        collection,
+        fresh_hours: Optional[float] = None,
+        max_stale_hours: Optional[float] = None,
+        store_html: Optional[bool] = None
+    ):
+        self.collection = collection
+        self.fresh = timedelta(hours=fresh_hours if fresh_hours is not None else float(
+            os.getenv("SNAPSHOT_FRESH_HOURS", 12)))
+        self.max_stale = timedelta(hours=max_stale_hours if max_stale_hours is not None else float(
+            os.getenv("SNAPSHOT_MAX_STALE_HOURS", 168)))
+        self.store_html = store_html if store_html is not None else (
+            os.getenv("SNAPSHOT_STORE_HTML", "0") == "1")
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._followups: Set[asyncio.Task] = set()
+        self._fresh_hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._refreshes = 0
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("product_id", unique=True)
+
+    async def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one(
+            {"product_id": product_id}, {"_id": 0, "html": 0})
+
+    async def get_html(self, product_id: str) -> Optional[str]:
+        doc = await self.collection.find_one({"product_id": product_id}, {"html": 1})
+        if not doc or not doc.get("html"):
+            return None
+        return zlib.decompress(doc["html"]).decode("utf-8")
+
+    async def save(self, product_id: str, url: str, response: Dict[str, Any]):
+        doc = {field: response.get(field) for field in SNAPSHOT_FIELDS}
+        doc.update({
+            "product_id": product_id,
+            "url": url,
+            "tier": response.get("tier"),
+            "scraped_at": datetime.now(timezone.utc),
+        })
+        if response.get("html"):
+            doc["html"] = Binary(zlib.compress(response["html"].encode("utf-8")))
+        await self.collection.replace_one({"product_id": product_id}, doc, upsert=True)
+
+    async def _scrape_and_save(self, product_id: str, url: str, browser_pool: Optional[BrowserPool]):
+        response, status_code = await scrape(url, browser_pool, include_html=self.store_html)
+        if status_code == 200 and response.get("reviews"):
+            try:
+                await self.save(product_id, url, response)
+            except Exception as e:
+                logger.warning(f"Failed to save snapshot for product {product_id}: {e}")
+        response.pop("html", None)
+        return response, status_code
+
+    def _run_followup(self, product_id: str, on_refresh: Callable[[], Awaitable[None]]):
+        task = asyncio.create_task(on_refresh())
+        self._followups.add(task)
+
+        def _done(task: asyncio.Task):
+            self._followups.discard(task)
+            if not task.cancelled() and task.exception():
+                logger.warning(f"Refresh callback failed for product {product_id}: {task.exception()}")
+
+        task.add_done_callback(_done)
+
+    def _refresh_in_background(
+        self,
+        product_id: str,
+        url: str,
+        browser_pool: Optional[BrowserPool],
+        on_refresh: Optional[Callable[[], Awaitable[None]]] = None
+    ):
+        if product_id in self._refreshing:
+            return
+        self._refreshes += 1
+        task = asyncio.create_task(self._scrape_and_save(product_id, url, browser_pool))
+        self._refreshing[product_id] = task
+
+        def _done(task: asyncio.Task):
+            self._refreshing.pop(product_id, None)
+            if task.cancelled():
+                return
+            if task.exception():
+                logger.warning(f"Snapshot refresh failed for product {product_id}: {task.exception()}")
+                return
+            response, status_code = task.result()
+            if on_refresh is not None and status_code == 200 and response.get("reviews"):
+                self._run_followup(product_id, on_refresh)
+
+        task.add_done_callback(_done)
+
+    async def scrape(
+        self,
+        product_id: str,
+        url: str,
+        browser_pool: Optional[BrowserPool] = None,
+        on_refresh: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Serve a stored snapshot according to the freshness policy, or scrape.
+        A served snapshot carries its `scraped_at`; `on_refresh` is called
+        after a background refresh started by this call has been saved.
+        """
+        snapshot = await self.get(product_id)
+        if snapshot:
+            scraped_at = snapshot["scraped_at"]
+            if scraped_at.tzinfo is None:
+                scraped_at = scraped_at.replace(tzinfo=timezone.utc)
+            age = datetime.now(timezone.utc) - scraped_at
+
+            if age <= self.max_stale:
+                if age <= self.fresh:
+                    self._fresh_hits += 1
+                else:
+                    self._stale_hits += 1
+                    logger.info(f"Refreshing stale snapshot for product {product_id} in the background")
+                    self._refresh_in_background(product_id, url, browser_pool, on_refresh)
+                response = {field: snapshot.get(field) for field in SNAPSHOT_FIELDS}
+                response.update({
+                    "tier": "snapshot",
+                    "snapshot_age_seconds": round(age.total_seconds()),
+                    "scraped_at": scraped_at,
+                    "success": True,
+                })
+                return response, 200
+
+        self._misses += 1
+        refreshing = self._refreshing.get(product_id)
+        if refreshing is not None:
+            # Join the background re-scrape rather than starting a second one
+            return await asyncio.shield(refreshing)
+        return await self._scrape_and_save(product_id, url, browser_pool)
+
+    async def close(self):
+        tasks = [*self._refreshing.values(), *self._followups]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fresh_hits": self._fresh_hits,
+            "stale_hits": self._stale_hits,
+            "misses": self._misses,
+            "refreshes": self._refreshes,
+            "refreshing": len(self._refreshing),
+        }
@@ -12,7 +12,7 @@ async def summarize(reviews=None):
     if not reviews:
         return {"error": "No reviews provided for Summarizing Reviews"}, 400
     try:
-        summary = summarize_reviews(reviews)
+        summary = await summarize_reviews(reviews)
         return {"summary": summary}, 200
     except Exception as e:
         return {"error": f"Error occurred in Summarizing Reviews: {e}"}, 500
@@ -0,0 +1,83 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class UserStore:
+    """
+    Data access for user documents. History updates are single atomic
+    operators ($push with $slice, $pull) instead of read-modify-write,
+    and reads project only the fields (or the one history entry) needed.
+    """
+
+    def __init__(self, collection, max_recent_searches: Optional[int] = None):
+        self.collection = collection
+        self.max_recent_searches = max_recent_searches if max_recent_searches is not None else int(
+            os.getenv("MAX_RECENT_SEARCHES", 5))
+
+    async def ensure_indexes(self):
+        try:
+            await self.collection.create_index("username", unique=True)
+        except OperationFailure as e:
+            # Existing duplicate usernames must be cleaned up by hand
+            logger.error(f"Could not create unique username index: {e}")
+
+    async def exists(self, username: str) -> bool:
+        return await self.collection.find_one({"username": username}, {"_id": 1}) is not None
+
+    async def create(self, user: Dict[str, Any]) -> bool:
+        """Insert a new user; False if the username is already taken"""
+        try:
+            await self.collection.insert_one(user)
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def get_credentials(self, username: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one(
+            {"username": username}, {"_id": 0, "username": 1, "password": 1})
+
+    async def list_recent_searches(self, username: str) -> Optional[List[Dict[str, Any]]]:
+        """The user's history, or None if the user does not exist"""
+        user = await self.collection.find_one(
+            {"username": username}, {"_id": 0, "recentSearches": 1})
+        return user.get("recentSearches", []) if user else None
+
+    async def find_recent_search(self, username: str, product_id: str) -> Optional[Dict[str, Any]]:
+        """
+        The user document projected to at most the one matching history
+        entry under "recentSearches", or None if the user does not exist.
+        A user without the product in their history yields `{}`, so
+        callers must test for None rather than falsiness.
+        """
+        return await self.collection.find_one(
+            {"username": username},
+            {"_id": 0, "recentSearches": {"$elemMatch": {"product_id": product_id}}}
+        )
+
+    async def add_recent_search(self, username: str, search: Dict[str, Any]) -> bool:
+        """
+        Append to the user's history, keeping only the newest
+        `max_recent_searches`. No-op if the product is already there.
+        """
+        result = await self.collection.update_one(
+            {"username": username, "recentSearches.product_id": {"$ne": search["product_id"]}},
+            {"$push": {"recentSearches": {
+                "$each": [search],
+                "$slice": -self.max_recent_searches
+            }}}
+        )
+        return result.modified_count > 0
+
+    async def remove_recent_search(self, username: str, product_id: str) -> bool:
+        """Remove a product from the history; False if the user does not exist"""
+        result = await self.collection.update_one(
+            {"username": username},
+            {"$pull": {"recentSearches": {"product_id": product_id}}}
+        )
+        return result.matched_count > 0
@@ -0,0 +1,100 @@
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from bson.binary import Binary
+from util.cache import LRUCache
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def pack_vectors(vectors: List[List[float]]) -> Tuple[Binary, int]:
+    """Pack row vectors into one contiguous float32 matrix blob"""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    dim = matrix.shape[1] if matrix.ndim == 2 else 0
+    return Binary(matrix.tobytes()), dim
+
+
+def unpack_vectors(blob: bytes, count: int, dim: int) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float32).reshape(count, dim)
+
+
+class ProductVectors(NamedTuple):
+    matrix: np.ndarray
+    texts: List[str]
+    version: datetime
+    model: Optional[str] = None
+    # Content hash of the text each chunk was split from, when recorded
+    sources: List[Optional[str]] = []
+
+
+def _entry_size(entry: ProductVectors) -> int:
+    return entry.matrix.nbytes + sum(len(text) for text in entry.texts)
+
+
+class VectorStore:
+    """
+    Chunk texts and their embeddings per product, stored as one packed
+    float32 matrix so reading a product's vectors is a single blob decode.
+    Decoded matrices are kept in a byte-bounded LRU; a cached entry is
+    used as long as its `updated_at` still matches the stored document.
+    """
+
+    def __init__(self, collection, cache_max_mb: Optional[float] = None):
+        self.collection = collection
+        max_mb = cache_max_mb if cache_max_mb is not None else float(
+            os.getenv("VECTOR_CACHE_MAX_MB", 256))
+        self.cache = LRUCache(max_bytes=int(max_mb * 1024 * 1024), sizeof=_entry_size)
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("product_id", unique=True)
+
+    async def save(self, product_id: str, model: str, info_docs: List[Dict[str, object]]):
+        self.cache.pop(product_id)
+        blob, dim = pack_vectors([doc["vectors"] for doc in info_docs])
+        await self.collection.replace_one(
+            {"product_id": product_id},
+            {
+                "product_id": product_id,
+                "model": model,
+                "count": len(info_docs),
+                "dim": dim,
+                "vectors": blob,
+                "texts": [doc["doc_text"] for doc in info_docs],
+                "sources": [doc.get("source") for doc in info_docs],
+                "updated_at": datetime.now(timezone.utc),
+            },
+            upsert=True
+        )
+
+    async def load(self, product_id: str) -> Optional[ProductVectors]:
+        """
+        Return the (count x dim) float32 matrix and chunk texts of a
+        product, with the `updated_at` version they were read at
+        """
+        cached = self.cache.get(product_id)
+        if cached is not None:
+            current = await self.collection.find_one(
+                {"product_id": product_id}, {"_id": 0, "updated_at": 1})
+            if current and current["updated_at"] == cached.version:
+                return cached
+            self.cache.pop(product_id)
+
+        doc = await self.collection.find_one({"product_id": product_id})
+        if not doc or not doc.get("count"):
+            return None
+        vectors = ProductVectors(
+            unpack_vectors(doc["vectors"], doc["count"], doc["dim"]),
+            doc["texts"],
+            doc["updated_at"],
+            doc.get("model"),
+            doc.get("sources", [])
+        )
+        self.cache.put(product_id, vectors)
+        return vectors
+
+    def stats(self) -> Dict[str, float]:
+        return self.cache.stats()
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from models.embedding_processor import EMBEDDING_MODEL_NAME, get_embedding_model, get_tokenizer
+from models.sentiment import MODEL_NAME as SENTIMENT_MODEL_NAME, SENTIMENT_ENGINE, get_local_sentiment_model
+from util.executor import run_model
+
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_CACHE_DIR = "./hf_cache"
+
+
+def offline_mode() -> bool:
+    return os.getenv("OFFLINE_MODE", "0") == "1"
+
+
+def required_models() -> List[str]:
+    """Models loaded in-process; remote inference models are not downloaded"""
+    models = [EMBEDDING_MODEL_NAME]
+    if SENTIMENT_ENGINE != "api":
+        models.append(SENTIMENT_MODEL_NAME)
+    return models
+
+
+def check_model_artifacts():
+    """Fail fast if a required model is not in the local cache"""
+    from huggingface_hub import try_to_load_from_cache
+
+    missing = [
+        model for model in required_models()
+        if not isinstance(try_to_load_from_cache(model, "config.json", cache_dir=MODEL_CACHE_DIR), str)
+    ]
+    if missing:
+        raise RuntimeError(
+            f"Offline mode: model artifacts missing from {MODEL_CACHE_DIR}: {', '.join(missing)}")
+
+
+def _load_embedding_model():
+    # One encode also initialises the torch kernels used by the first search
+    get_embedding_model(EMBEDDING_MODEL_NAME).embed_query("warm up")
+
+
+class Warmup:
+    """
+    Preloads models before the first search needs them. WARMUP_MODE is
+    "background" (serve immediately, load concurrently), "blocking"
+    (finish loading before serving; a failure aborts startup) or "off".
+    """
+
+    def __init__(self, mode: Optional[str] = None):
+        self.mode = (mode or os.getenv("WARMUP_MODE", "background")).lower()
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _steps(self) -> List[Tuple[str, Callable[[], object]]]:
+        steps = [
+            ("tokenizer", lambda: get_tokenizer(EMBEDDING_MODEL_NAME)),
+            ("embedding_model", _load_embedding_model),
+        ]
+        if SENTIMENT_ENGINE != "api":
+            steps.append(("sentiment_model", get_local_sentiment_model))
+        return steps
+
+    async def start(self):
+        if self.mode == "off":
+            self.status = "skipped"
+            return
+        if self.mode == "blocking":
+            await self._run()
+            return
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def _run(self):
+        self.status = "running"
+        started = time.perf_counter()
+        try:
+            for name, step in self._steps():
+                step_started = time.perf_counter()
+                await run_model(step)
+                self.timings[name] = round((time.perf_counter() - step_started) * 1000, 2)
+                logger.info(f"Warm-up: {name} loaded in {self.timings[name]:.0f} ms")
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            logger.error(f"Warm-up failed: {e}")
+            raise
+        self.timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+        self.status = "ready"
+        logger.info(f"Warm-up finished in {self.timings['total']:.0f} ms")
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("ready", "skipped")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "mode": self.mode,
+            "status": self.status,
+            "error": self.error,
+            "timings_ms": self.timings,
+        }